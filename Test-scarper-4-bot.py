@@ -5,21 +5,77 @@ import time
 import os
 import random
 from datetime import datetime
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from bs4 import BeautifulSoup
+from rubinot_records import (
+    PlayerRecord, DeathRecord, LevelUpRecord, LevelDownRecord, capture_timestamp, records_to_dicts
+)
+from rubinot_output import OUTPUT_FORMAT, save_ndjson
+from rubinot_cache import ParseCache, body_hash
+from rubinot_precheck import FAST_START, pages_unchanged
+from rubinot_parsing import ParsePool, parse_deaths_page, parse_players_page
+from rubinot_stats import KillerStats
+from rubinot_timeline import DeathTimeline
+from rubinot_watchlist import Watchlist, save_notifications
+from rubinot_budget import RunDeadline, RetryBudget, budgeted_retry
+from rubinot_circuit import CircuitBoard
+from rubinot_highscores import HIGHSCORES_ENABLED, HighscoresCrawler
+from rubinot_rrd import RoundRobinStore, snapshot_values
+from rubinot_profiling import PROFILE, profile_run, profile_stage
+from rubinot_history import History
+from rubinot_connections import TTFBTracker, pre_connect, pre_resolve
+from rubinot_state import ShardedLevels
+from rubinot_correlation import DeathCorrelator, save_death_events
+from rubinot_guilds import GUILDS_ENABLED, GuildRefresher, GuildRoster, save_guild_activity
+from rubinot_jobs import JOB_RUNNER, JobRunner, WorldState, world_jobs
+
+# Seconds between scrape cycles when running as a long-lived daemon; 0 runs once
+DAEMON_INTERVAL = int(os.getenv('RUBINOT_DAEMON_INTERVAL', '0'))
+
+# requests, urllib3 and bs4 are imported where they are used so that
+# runs which exit at the pre-check never load them
 
 class GitHubRubinOTScraper:
     def __init__(self):
         self.deaths_data = []
         self.online_players = []
-        self.previous_levels = {}
+        self.previous_levels = ShardedLevels('Mystian')
         self.session = None
+        self.parse_cache = ParseCache()
+        self.unchanged_pages = set()
+        self.parse_pool = ParsePool()
+        self.deaths_fetched = None
+        self.killer_stats = KillerStats()
+        self.death_timeline = DeathTimeline()
+        self.watchlist = Watchlist()
+        self.deadline = RunDeadline()
+        self.retry_budget = RetryBudget()
+        self.incomplete = set()
+        self.circuits = CircuitBoard()
+        self.stale_pages = set()
+        self.online_history = RoundRobinStore()
+        self.history = History()
+        self.adapter = None
+        self.ttfb = TTFBTracker()
+        self.level_downs = []
+        self.correlator = DeathCorrelator()
+        self.guilds = GuildRoster()
+        self.worlds = {}
         
     def setup_session(self):
-        """Setup requests session with retry logic and browser-like headers"""
+        """Setup requests session with retry logic and browser-like headers
+        
+        The session and its kept-alive connections are reused across runs;
+        later calls only rebind the retry strategy to the current run's
+        budget and deadline.
+        """
+        if self.session is not None:
+            self.adapter.max_retries = self.build_retry()
+            return
+        
+        import requests
+        from requests.adapters import HTTPAdapter
+        
         self.session = requests.Session()
+        self.ttfb.install(self.session)
         
         # Set realistic headers to appear more like a real browser
         self.session.headers.update({
@@ -39,63 +95,145 @@ class GitHubRubinOTScraper:
             'Cache-Control': 'max-age=0',
         })
         
-        # Setup retry strategy for network issues
-        retry_strategy = Retry(
+        self.adapter = HTTPAdapter(max_retries=self.build_retry())
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+    
+    def build_retry(self):
+        """Retry strategy for network issues, capped by the run's shared retry budget and deadline"""
+        return budgeted_retry(
+            self.retry_budget,
+            self.deadline,
             total=5,
             backoff_factor=2,
             status_forcelist=[429, 500, 502, 503, 504, 520, 522, 524],
             allowed_methods=["HEAD", "GET", "POST", "OPTIONS"]
         )
-        
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
+    
+    def warm_up(self):
+        """Resolve and connect to the site while saved state is still loading"""
+        # A run with every circuit open serves stale results without touching the network
+        if self.circuits.is_open('deaths') and self.circuits.is_open('players'):
+            return
+        pre_resolve()
+        self.setup_session()
+        elapsed = pre_connect(self.session, timeout=self.deadline.request_timeout(10))
+        if elapsed is not None:
+            print(f"Connection to rubinot.com.br warmed up in {elapsed:.2f}s")
     
     async def scrape_mystian_data(self):
         """Scrape both deaths and online players from RubinOT Mystian world"""
         try:
             print("Starting GitHub Actions scraper...")
+            self.unchanged_pages = set()
+            self.deadline = RunDeadline()
+            self.retry_budget = RetryBudget()
+            self.incomplete = set()
+            self.stale_pages = set()
+            self.ttfb.reset()
+            self.level_downs = []
+            
+            # With every circuit open, answer from the last good results without touching the network
+            if self.circuits.is_open('deaths') and self.circuits.is_open('players'):
+                print("All circuits open, serving last good results")
+                return {
+                    'deaths': self.serve_stale('deaths', DeathRecord.from_dict),
+                    'online_players': self.serve_stale('players', PlayerRecord.from_dict),
+                    'level_ups': [],
+                    'level_downs': [],
+                    'unchanged': False,
+                    'incomplete': [],
+                    'stale': sorted(self.stale_pages)
+                }
+            
             self.setup_session()
             
             # Check GitHub Actions environment
             if os.getenv('GITHUB_ACTIONS'):
                 print("Running in GitHub Actions environment")
             
-            # Scrape deaths first
+            # Scrape deaths first; its parse may still be running in the pool
+            # while the players page is fetched
             print("Scraping deaths...")
-            deaths = await self.scrape_deaths()
+            self.deaths_fetched = asyncio.Event()
+            deaths_task = asyncio.create_task(self.scrape_deaths())
+            await self.run_stage('Deaths fetch', self.deaths_fetched.wait(), self.deadline.stage_timeout(2))
             
             # Wait between requests to be respectful
-            await asyncio.sleep(random.uniform(3, 7))
+            if not self.circuits.is_open('players'):
+                await asyncio.sleep(min(random.uniform(3, 7), self.deadline.remaining()))
             
             # Scrape online players
             print("Scraping online players...")
-            players, level_ups = await self.scrape_online_players()
+            players, level_ups = await self.run_stage('Online players', self.scrape_online_players(),
+                                                      self.deadline.stage_timeout(1), ([], []),
+                                                      ('online_players', 'level_ups'))
+            deaths = await self.run_stage('Deaths', deaths_task, self.deadline.remaining(), [], ('deaths',))
+            
+            # Offline players only show up in the highscores; the crawl fills
+            # offline_level_ups in place so a timeout keeps what it found
+            offline_level_ups = []
+            if HIGHSCORES_ENABLED and not self.deadline.expired:
+                print("Crawling highscores...")
+                await self.run_stage('Highscores', self.scrape_highscores(offline_level_ups),
+                                     self.deadline.remaining())
+            
+            # Rosters are refreshed for guilds with a member active this cycle
+            if GUILDS_ENABLED and not self.deadline.expired:
+                print("Refreshing guild rosters...")
+                active = [player.name for player in players] + [death.player for death in deaths]
+                active += [level_up.player for level_up in offline_level_ups]
+                await self.run_stage('Guild rosters', self.refresh_guilds(active), self.deadline.remaining())
             
             return {
                 'deaths': deaths,
                 'online_players': players,
-                'level_ups': level_ups
+                'level_ups': level_ups + offline_level_ups,
+                'level_downs': self.level_downs,
+                # Highscores reconciliation may have updated levels even without level ups
+                'unchanged': {'deaths', 'players'} <= self.unchanged_pages and not self.previous_levels.dirty,
+                'incomplete': sorted(self.incomplete),
+                'stale': sorted(self.stale_pages)
             }
             
         except Exception as e:
             print(f"Error during scraping: {e}")
             return {'deaths': [], 'online_players': [], 'level_ups': []}
-        finally:
-            if self.session:
-                self.session.close()
+    
+    async def run_stage(self, name, awaitable, timeout, default=None, keys=()):
+        """Await a stage within its slice of the run deadline, cancelling it when time runs out"""
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            print(f"{name} stage ran out of time ({timeout:.0f}s slice), keeping partial results")
+            self.incomplete.update(keys)
+            return default
+    
+    def serve_stale(self, page, from_dict):
+        """Last good parsed result for a page, flagged as stale"""
+        rows = self.parse_cache.last_good(page)
+        if rows is None:
+            print(f"No previous {page} result to fall back on")
+            return []
+        self.stale_pages.add(page)
+        print(f"Serving {len(rows)} stale {page} records from the last good parse")
+        return [from_dict(row) for row in rows]
     
     async def scrape_deaths(self):
         """Scrape deaths from RubinOT Mystian world"""
         try:
+            if not self.circuits.allow_request('deaths'):
+                return self.serve_stale('deaths', DeathRecord.from_dict)
+            
             # Random delay to avoid appearing automated
             await asyncio.sleep(random.uniform(2, 4))
             
             print("Fetching deaths page...")
-            response = self.session.get('https://rubinot.com.br/?subtopic=latestdeaths', 
-                                      timeout=30)
+            response = await asyncio.to_thread(self.session.get, 'https://rubinot.com.br/?subtopic=latestdeaths', 
+                                               timeout=self.deadline.request_timeout())
             response.raise_for_status()
             
+            from bs4 import BeautifulSoup
             soup = BeautifulSoup(response.content, 'html.parser')
             
             # Look for world selection form
@@ -128,113 +266,195 @@ class GitHubRubinOTScraper:
                     await asyncio.sleep(random.uniform(1, 3))
                     
                     # Submit form
-                    response = self.session.post(form_url, data=form_data, timeout=30)
+                    response = await asyncio.to_thread(self.session.post, form_url, data=form_data,
+                                                       timeout=self.deadline.request_timeout())
                     response.raise_for_status()
-                    soup = BeautifulSoup(response.content, 'html.parser')
                     print("Form submitted successfully")
             
-            deaths = self.parse_deaths_html(soup)
+            self.circuits.record_success('deaths')
+            if self.deaths_fetched:
+                self.deaths_fetched.set()
+            
+            # Skip parsing entirely when the deaths table is byte-identical to last run
+            digest = body_hash(response.content)
+            cached = self.parse_cache.lookup('deaths', digest)
+            if cached is not None:
+                self.unchanged_pages.add('deaths')
+                print(f"Deaths table unchanged, reusing {len(cached)} cached deaths")
+                return [DeathRecord.from_dict(row) for row in cached]
+            
+            deaths = await self.parse_pool.parse(parse_deaths_page, response.content, capture_timestamp())
+            self.parse_cache.store('deaths', digest, deaths)
             print(f"Found {len(deaths)} deaths")
             return deaths
             
         except Exception as e:
             print(f"Error scraping deaths: {e}")
-            return []
+            self.circuits.record_failure('deaths')
+            return self.serve_stale('deaths', DeathRecord.from_dict)
+        finally:
+            if self.deaths_fetched:
+                self.deaths_fetched.set()
     
     async def scrape_online_players(self):
         """Scrape online players and detect level changes"""
         try:
+            if not self.circuits.allow_request('players'):
+                return self.serve_stale('players', PlayerRecord.from_dict), []
+            
             # Random delay between requests
             await asyncio.sleep(random.uniform(2, 4))
             
             print("Fetching online players page...")
-            response = self.session.get('https://rubinot.com.br/?subtopic=worlds&world=Mystian', 
-                                      timeout=30)
+            response = await asyncio.to_thread(self.session.get, 'https://rubinot.com.br/?subtopic=worlds&world=Mystian', 
+                                               timeout=self.deadline.request_timeout())
             response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            players = []
-            level_ups = []
-            
-            # Find the players table - look for table with player data
-            tables = soup.find_all('table')
-            players_table = None
-            
-            for table in tables:
-                rows = table.find_all('tr')
-                if len(rows) > 1:
-                    # Check if this looks like a players table
-                    first_row = rows[1] if len(rows) > 1 else rows[0]
-                    cells = first_row.find_all(['td', 'th'])
-                    
-                    if len(cells) >= 3:
-                        # Check if the second cell contains a number (level)
-                        try:
-                            int(cells[1].get_text().strip())
-                            players_table = table
-                            break
-                        except:
-                            continue
-            
-            if not players_table:
+            self.circuits.record_success('players')
+            captured_at = capture_timestamp()
+            
+            # An unchanged players table cannot contain level changes
+            digest = body_hash(response.content)
+            cached = self.parse_cache.lookup('players', digest)
+            if cached is not None:
+                self.unchanged_pages.add('players')
+                print(f"Players table unchanged, reusing {len(cached)} cached players")
+                players = [PlayerRecord(row['name'], row['level'], row['vocation'], captured_at)
+                           for row in cached]
+                return players, []
+            
+            players = await self.parse_pool.parse(parse_players_page, response.content, captured_at)
+            if players is None:
                 print("Could not find players table")
                 return [], []
+            self.parse_cache.store('players', digest, players)
             
-            # Parse players from the table
-            rows = players_table.find_all('tr')[1:]  # Skip header
-            for row in rows:
-                cells = row.find_all(['td', 'th'])
-                if len(cells) >= 3:
-                    player_name = cells[0].get_text().strip()
-                    level_text = cells[1].get_text().strip()
-                    vocation = cells[2].get_text().strip() if len(cells) > 2 else 'Unknown'
-                    
-                    try:
-                        current_level = int(level_text)
-                        
-                        if player_name and current_level > 0:
-                            player_data = {
-                                'name': player_name,
-                                'level': current_level,
-                                'vocation': vocation,
-                                'timestamp': int(time.time() * 1000)
-                            }
-                            players.append(player_data)
-                            
-                            # Check for level changes
-                            if player_name in self.previous_levels:
-                                previous_level = self.previous_levels[player_name]
-                                if current_level > previous_level:
-                                    level_difference = current_level - previous_level
-                                    level_up = {
-                                        'player': player_name,
-                                        'previous_level': previous_level,
-                                        'new_level': current_level,
-                                        'level_gain': level_difference,
-                                        'vocation': vocation,
-                                        'timestamp': int(time.time() * 1000),
-                                        'id': f"{player_name}-{previous_level}-{current_level}-{int(time.time())}"
-                                    }
-                                    level_ups.append(level_up)
-                                    print(f"Level up detected: {player_name} {previous_level} -> {current_level} (+{level_difference})")
-                            
-                            # Update previous level
-                            self.previous_levels[player_name] = current_level
-                            
-                    except ValueError:
-                        continue
+            level_ups = self.detect_level_ups(players)
             
             print(f"Found {len(players)} online players, {len(level_ups)} level ups")
             return players, level_ups
             
         except Exception as e:
             print(f"Error scraping online players: {e}")
-            return [], []
+            self.circuits.record_failure('players')
+            # Stale players carry no level changes
+            return self.serve_stale('players', PlayerRecord.from_dict), []
+    
+    async def fetch_content(self, url):
+        """GET a page off the event loop within the run deadline and return its raw bytes"""
+        response = await asyncio.to_thread(self.session.get, url, timeout=self.deadline.request_timeout())
+        response.raise_for_status()
+        return response.content
+    
+    async def scrape_highscores(self, level_ups):
+        """Crawl the level ranking for level ups of players who were not online"""
+        if not self.circuits.allow_request('highscores'):
+            return level_ups
+        
+        try:
+            await HighscoresCrawler(self.fetch_content, self.parse_pool).crawl(self.previous_levels, level_ups, self.level_downs)
+            self.circuits.record_success('highscores')
+        except Exception as e:
+            print(f"Error crawling highscores: {e}")
+            self.circuits.record_failure('highscores')
+        print(f"Found {len(level_ups)} offline level ups")
+        return level_ups
+    
+    async def refresh_guilds(self, active_players):
+        """Refresh the guild list and the stale rosters of guilds with active members"""
+        if not self.circuits.allow_request('guilds'):
+            return 0
+        try:
+            refreshed = await GuildRefresher(self.fetch_content, self.parse_pool, self.guilds).refresh(active_players)
+            self.circuits.record_success('guilds')
+            return refreshed
+        except Exception as e:
+            print(f"Error refreshing guild rosters: {e}")
+            self.circuits.record_failure('guilds')
+            return 0
+    
+    def detect_level_ups(self, players, previous_levels=None, level_downs=None):
+        """Compare players against previous levels and record level gains
+        
+        Level losses are collected in level_downs (self.level_downs by
+        default) for death correlation; pass False to skip them.
+        """
+        if previous_levels is None:
+            previous_levels = self.previous_levels
+        if level_downs is None:
+            level_downs = self.level_downs
+        level_ups = []
+        for player in players:
+            # Check for level changes
+            if player.name in previous_levels:
+                previous_level = previous_levels[player.name]
+                if player.level > previous_level:
+                    level_up = LevelUpRecord(player.name, previous_level, player.level,
+                                             player.vocation, player.timestamp)
+                    level_ups.append(level_up)
+                    print(f"Level up detected: {player.name} {previous_level} -> {player.level} (+{level_up.level_gain})")
+                elif player.level < previous_level and level_downs is not False:
+                    level_downs.append(LevelDownRecord(player.name, previous_level, player.level,
+                                                       player.vocation, player.timestamp))
+            
+            # Update previous level
+            previous_levels[player.name] = player.level
+        return level_ups
+    
+    async def fetch_job(self, job):
+        """Fetch a job's page through the shared session, behind the job's own circuit"""
+        if not self.circuits.allow_request(job.key):
+            raise RuntimeError("circuit open")
+        try:
+            if job.data is None:
+                response = await asyncio.to_thread(self.session.get, job.url, timeout=self.deadline.request_timeout())
+            else:
+                response = await asyncio.to_thread(self.session.post, job.url, data=job.data,
+                                                   timeout=self.deadline.request_timeout())
+            response.raise_for_status()
+        except Exception:
+            self.circuits.record_failure(job.key)
+            raise
+        self.circuits.record_success(job.key)
+        return response.content
+    
+    def world_state(self, world):
+        state = self.worlds.get(world)
+        if state is None:
+            # The default world keeps using the level shards loaded at startup
+            levels = self.previous_levels if world == self.previous_levels.world else ShardedLevels(world)
+            state = self.worlds[world] = WorldState(world, levels)
+        return state
+    
+    async def handle_job(self, job, content):
+        """Parse a changed page and write its new records tagged with the job's world"""
+        state = self.world_state(job.world)
+        captured_at = capture_timestamp()
+        data = {'deaths': [], 'online_players': [], 'level_ups': [], 'new_deaths': []}
+        if job.page == 'deaths':
+            deaths = await self.parse_pool.parse(parse_deaths_page, content, captured_at)
+            data['deaths'] = data['new_deaths'] = state.timeline.merge(deaths)
+        else:
+            data['online_players'] = await self.parse_pool.parse(parse_players_page, content, captured_at) or []
+            # Nothing correlates level losses in job runner mode
+            data['level_ups'] = self.detect_level_ups(data['online_players'], state.levels, level_downs=False)
+        self.save_world_data(job.world, data)
+        print(f"{job.key}: {len(data['deaths'])} new deaths, {len(data['online_players'])} players, "
+              f"{len(data['level_ups'])} level ups")
+    
+    def save_world_data(self, world, data):
+        """Append one job's records to the world-tagged streams; one JSON file per page cannot hold many worlds"""
+        try:
+            if OUTPUT_FORMAT == 'segments':
+                self.history.append_scrape(data, data['new_deaths'], world)
+            else:
+                save_ndjson(data, world)
+        except Exception as e:
+            print(f"Error saving {world} data: {e}")
     
     def parse_deaths_html(self, soup):
         """Parse deaths from HTML content"""
         deaths = []
+        captured_at = capture_timestamp()
         
         tables = soup.find_all('table')
         for table in tables:
@@ -263,22 +483,29 @@ from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import subprocess
 import sys
+from rubinot_records import (
+    PlayerRecord, DeathRecord, LevelUpRecord, capture_timestamp, records_to_dicts
+)
+from rubinot_proxies import ProxyPool, TOR_PROXY
+from rubinot_connections import CHECK_EXIT_IP, TOR_NEWNYM, TTFBTracker
+from rubinot_state import ShardedLevels
 
 class TorRubinOTScraper:
     def __init__(self):
         self.deaths_data = []
         self.online_players = []
-        self.previous_levels = {}
+        self.previous_levels = ShardedLevels('Mystian')
         self.session = None
         self.tor_process = None
+        self.proxy_pool = None
+        self.ttfb = TTFBTracker()
         
     def start_tor(self):
         """Start Tor service if not already running"""
         try:
             # Check if Tor is already running
             response = requests.get('http://httpbin.org/ip', 
-                                  proxies={'http': 'socks5h://127.0.0.1:9050',
-                                          'https': 'socks5h://127.0.0.1:9050'},
+                                  proxies={'http': TOR_PROXY, 'https': TOR_PROXY},
                                   timeout=10)
             print("Tor is already running")
             return True
@@ -295,8 +522,7 @@ class TorRubinOTScraper:
                 
                 # Test connection again
                 response = requests.get('http://httpbin.org/ip', 
-                                      proxies={'http': 'socks5h://127.0.0.1:9050',
-                                              'https': 'socks5h://127.0.0.1:9050'},
+                                      proxies={'http': TOR_PROXY, 'https': TOR_PROXY},
                                       timeout=10)
                 print(f"Tor started successfully. IP: {response.json()['origin']}")
                 return True
@@ -305,15 +531,14 @@ class TorRubinOTScraper:
                 print(f"Failed to start Tor: {e}")
                 return False
     
-    def setup_session(self):
-        """Setup requests session with Tor proxy and retry logic"""
+    def setup_session(self, use_tor=True):
+        """Setup requests session with the proxy pool and retry logic"""
         self.session = requests.Session()
+        self.ttfb.install(self.session)
         
-        # Configure Tor proxy
-        self.session.proxies = {
-            'http': 'socks5h://127.0.0.1:9050',
-            'https': 'socks5h://127.0.0.1:9050'
-        }
+        # Requests are routed per call through the health-scored proxy pool
+        # (Tor plus any RUBINOT_PROXIES), not a fixed session proxy
+        self.proxy_pool = ProxyPool.from_env(include_tor=use_tor)
         
         # Set headers to appear more like a real browser
         self.session.headers.update({
@@ -336,7 +561,8 @@ class TorRubinOTScraper:
             status_forcelist=[429, 500, 502, 503, 504],
         )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # Through proxies the pool fails over instead of retrying a slow exit
+        adapter = HTTPAdapter(max_retries=self.proxy_pool.adapter_retries(retry_strategy))
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
     
@@ -363,31 +589,34 @@ class TorRubinOTScraper:
             print("Starting Tor-enabled scraper...")
             
             # Start Tor if needed
-            if not self.start_tor():
-                print("Failed to start Tor, using direct connection")
-                self.session = requests.Session()
-            else:
-                self.setup_session()
-            
-            # Test current IP
-            try:
-                ip_response = self.session.get('http://httpbin.org/ip', timeout=10)
-                print(f"Current IP: {ip_response.json()['origin']}")
-            except:
-                print("Could not determine current IP")
+            tor_running = self.start_tor()
+            if not tor_running:
+                print("Failed to start Tor, using configured proxies or a direct connection")
+            self.setup_session(use_tor=tor_running)
+            
+            # Test current IP (an extra round trip, so only on request)
+            if CHECK_EXIT_IP:
+                try:
+                    ip_response = self.proxy_pool.get(self.session, 'http://httpbin.org/ip', timeout=10)
+                    print(f"Current IP: {ip_response.json()['origin']}")
+                except:
+                    print("Could not determine current IP")
             
             # Scrape deaths first
             print("Scraping deaths...")
             deaths = await self.scrape_deaths()
             
-            # Get new Tor identity between requests
-            if hasattr(self, 'session') and self.session.proxies:
+            # A new Tor identity drops the warm circuit and connection, so it is opt-in
+            if TOR_NEWNYM and self.proxy_pool.includes(TOR_PROXY):
                 self.get_new_tor_identity()
             
             # Scrape online players
             print("Scraping online players...")
             players, level_ups = await self.scrape_online_players()
             
+            if self.ttfb.samples:
+                print(f"Time to first byte: {self.ttfb.summary()}")
+            
             return {
                 'deaths': deaths,
                 'online_players': players,
@@ -400,6 +629,8 @@ class TorRubinOTScraper:
         finally:
             if self.session:
                 self.session.close()
+            if self.proxy_pool:
+                self.proxy_pool.save()
             if self.tor_process:
                 self.tor_process.terminate()
     
@@ -410,8 +641,8 @@ class TorRubinOTScraper:
             await asyncio.sleep(random.uniform(2, 5))
             
             # Get the deaths page
-            response = self.session.get('https://rubinot.com.br/?subtopic=latestdeaths', 
-                                      timeout=30)
+            response = self.proxy_pool.get(self.session, 'https://rubinot.com.br/?subtopic=latestdeaths', 
+                                           timeout=30)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -432,7 +663,7 @@ class TorRubinOTScraper:
                 # Wait before submitting form
                 await asyncio.sleep(random.uniform(1, 3))
                 
-                response = self.session.post(form_url, data=form_data, timeout=30)
+                response = self.proxy_pool.post(self.session, form_url, data=form_data, timeout=30)
                 response.raise_for_status()
                 soup = BeautifulSoup(response.content, 'html.parser')
             
@@ -449,14 +680,15 @@ class TorRubinOTScraper:
             # Random delay between requests
             await asyncio.sleep(random.uniform(2, 5))
             
-            response = self.session.get('https://rubinot.com.br/?subtopic=worlds&world=Mystian', 
-                                      timeout=30)
+            response = self.proxy_pool.get(self.session, 'https://rubinot.com.br/?subtopic=worlds&world=Mystian', 
+                                           timeout=30)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
             
             players = []
             level_ups = []
+            captured_at = capture_timestamp()
             
             # Find the players table
             tables = soup.find_all('table')
@@ -474,30 +706,16 @@ class TorRubinOTScraper:
                                 current_level = int(level_text)
                                 
                                 if player_name and current_level > 0:
-                                    player_data = {
-                                        'name': player_name,
-                                        'level': current_level,
-                                        'vocation': vocation,
-                                        'timestamp': int(time.time() * 1000)
-                                    }
-                                    players.append(player_data)
+                                    players.append(PlayerRecord(player_name, current_level, vocation, captured_at))
                                     
                                     # Check for level changes
                                     if player_name in self.previous_levels:
                                         previous_level = self.previous_levels[player_name]
                                         if current_level > previous_level:
-                                            level_difference = current_level - previous_level
-                                            level_up = {
-                                                'player': player_name,
-                                                'previous_level': previous_level,
-                                                'new_level': current_level,
-                                                'level_gain': level_difference,
-                                                'vocation': vocation,
-                                                'timestamp': int(time.time() * 1000),
-                                                'id': f"{player_name}-{previous_level}-{current_level}-{int(time.time())}"
-                                            }
+                                            level_up = LevelUpRecord(player_name, previous_level, current_level,
+                                                                     vocation, captured_at)
                                             level_ups.append(level_up)
-                                            print(f"Level up detected: {player_name} {previous_level} -> {current_level} (+{level_difference})")
+                                            print(f"Level up detected: {player_name} {previous_level} -> {current_level} (+{level_up.level_gain})")
                                     
                                     # Update previous level
                                     self.previous_levels[player_name] = current_level
@@ -518,6 +736,7 @@ class TorRubinOTScraper:
     def parse_deaths_html(self, soup):
         """Parse deaths from HTML content"""
         deaths = []
+        captured_at = capture_timestamp()
         
         tables = soup.find_all('table')
         for table_idx, table in enumerate(tables):
@@ -542,14 +761,8 @@ class TorRubinOTScraper:
                         if killer.endswith('.'):
                             killer = killer[:-1]
                         
-                        death_data = {
-                            'player': player,
-                            'level': level,
-                            'killer': killer,
-                            'time': time_text,
-                            'timestamp': int(time.time() * 1000),
-                            'id': f"{player}-{level}-{killer}-{time_text}"
-                        }
+                        death_data = DeathRecord(player, level, killer, time_text, captured_at,
+                                                 f"{player}-{level}-{killer}-{time_text}")
                         deaths.append(death_data)
                         deaths_in_this_table += 1
                         
@@ -562,24 +775,19 @@ class TorRubinOTScraper:
         return deaths[:20]  # Return max 20 recent deaths
     
     def load_previous_levels(self):
-        """Load previous level data from file"""
-        try:
-            if os.path.exists('previous_levels.json'):
-                with open('previous_levels.json', 'r') as f:
-                    self.previous_levels = json.load(f)
-                    print(f"Loaded {len(self.previous_levels)} previous player levels")
-            else:
-                print("No previous levels file found, starting fresh")
-                self.previous_levels = {}
-        except Exception as e:
-            print(f"Error loading previous levels: {e}")
-            self.previous_levels = {}
+        """Open this world's sharded level state; shards load on first access"""
+        self.previous_levels = ShardedLevels('Mystian')
+        # One-time move of the old single-file state into the shards
+        self.previous_levels.migrate_legacy()
+        if not self.previous_levels.exists():
+            print("No previous levels found, starting fresh")
     
     def save_previous_levels(self):
-        """Save current level data for next run"""
+        """Save the level shards that changed for next run"""
         try:
-            with open('previous_levels.json', 'w') as f:
-                json.dump(self.previous_levels, f, indent=2)
+            saved = self.previous_levels.save()
+            if saved:
+                print(f"Saved {saved} changed level shards")
         except Exception as e:
             print(f"Error saving previous levels: {e}")
     
@@ -590,7 +798,7 @@ class TorRubinOTScraper:
             deaths_data = {
                 'lastUpdated': datetime.now().isoformat(),
                 'world': 'Mystian',
-                'data': data['deaths']
+                'data': records_to_dicts(data['deaths'])
             }
             with open('rubinot_deaths.json', 'w') as f:
                 json.dump(deaths_data, f, indent=2)
@@ -599,7 +807,7 @@ class TorRubinOTScraper:
             players_data = {
                 'lastUpdated': datetime.now().isoformat(),
                 'world': 'Mystian',
-                'data': data['online_players']
+                'data': records_to_dicts(data['online_players'])
             }
             with open('rubinot_players.json', 'w') as f:
                 json.dump(players_data, f, indent=2)
@@ -608,7 +816,7 @@ class TorRubinOTScraper:
             levelups_data = {
                 'lastUpdated': datetime.now().isoformat(),
                 'world': 'Mystian',
-                'data': data['level_ups']
+                'data': records_to_dicts(data['level_ups'])
             }
             with open('rubinot_levelups.json', 'w') as f:
                 json.dump(levelups_data, f, indent=2)
@@ -643,7 +851,7 @@ async def main():
         if data['level_ups']:
             print(f"\nRecent Level Ups:")
             for levelup in data['level_ups'][:5]:
-                print(f"   {levelup['player']}: {levelup['previous_level']} -> {levelup['new_level']} (+{levelup['level_gain']})")
+                print(f"   {levelup.player}: {levelup.previous_level} -> {levelup.new_level} (+{levelup.level_gain})")
     else:
         print("No data found")
     
@@ -668,17 +876,11 @@ if __name__ == "__main__":
                             elif i < len(cells) - 1:
                                 time_text = cells[i+1].get_text().strip()
                             
-                            death_data = {
-                                'player': player,
-                                'level': level,
-                                'killer': killer,
-                                'time': time_text,
-                                'timestamp': int(time.time() * 1000),
-                                'id': f"{player}-{level}-{killer}-{int(time.time())}"
-                            }
+                            death_data = DeathRecord(player, level, killer, time_text, captured_at,
+                                                     f"{player}-{level}-{killer}-{captured_at // 1000}")
                             
                             # Check for duplicates
-                            if not any(d['player'] == player and d['level'] == level and d['killer'] == killer for d in deaths):
+                            if not any(d.player == player and d.level == level and d.killer == killer for d in deaths):
                                 deaths.append(death_data)
                                 deaths_in_this_table += 1
                                 print(f"Parsed death: {player} (lvl {level}) killed by {killer}")
@@ -691,61 +893,84 @@ if __name__ == "__main__":
         return deaths[:20]  # Return max 20 recent deaths
     
     def load_previous_levels(self):
-        """Load previous level data from file"""
-        try:
-            if os.path.exists('previous_levels.json'):
-                with open('previous_levels.json', 'r', encoding='utf-8') as f:
-                    self.previous_levels = json.load(f)
-                    print(f"Loaded {len(self.previous_levels)} previous player levels")
-            else:
-                print("No previous levels file found, starting fresh")
-                self.previous_levels = {}
-        except Exception as e:
-            print(f"Error loading previous levels: {e}")
-            self.previous_levels = {}
+        """Open this world's sharded level state; shards load on first access"""
+        self.previous_levels = ShardedLevels('Mystian')
+        # One-time move of the old single-file state into the shards
+        self.previous_levels.migrate_legacy()
+        if not self.previous_levels.exists():
+            print("No previous levels found, starting fresh")
     
     def save_previous_levels(self):
-        """Save current level data for next run"""
+        """Save the level shards that changed for next run"""
         try:
-            with open('previous_levels.json', 'w', encoding='utf-8') as f:
-                json.dump(self.previous_levels, f, indent=2, ensure_ascii=False)
+            saved = self.previous_levels.save()
+            if saved:
+                print(f"Saved {saved} changed level shards")
         except Exception as e:
             print(f"Error saving previous levels: {e}")
     
     def save_data(self, data):
         """Save all scraped data to JSON files"""
         try:
+            if OUTPUT_FORMAT == 'ndjson':
+                # Stale records were already streamed when they were fresh
+                stale = set(data.get('stale', ()))
+                fresh = dict(data)
+                if 'deaths' in stale:
+                    fresh['deaths'] = fresh['new_deaths'] = []
+                if 'players' in stale:
+                    fresh['online_players'] = []
+                counts = save_ndjson(fresh, 'Mystian')
+                print(f"Streamed {counts['deaths']} new deaths, {counts['online_players']} players, {counts['level_ups']} level ups as NDJSON")
+                return
+            
+            if OUTPUT_FORMAT == 'segments':
+                # Small appends to the active segments instead of rewriting whole files every run
+                counts = self.history.append_scrape(data, data.get('new_deaths', ()), 'Mystian')
+                self.history.compact()
+                print(f"Appended {counts['deaths']} new deaths, {counts['levelups']} level ups and "
+                      f"{counts.get('players', 0)} player snapshots to history segments")
+                return
+            
             timestamp = datetime.now().isoformat()
+            # Keep the previous file for any stream whose stage ran out of time
+            incomplete = set(data.get('incomplete', ()))
+            stale = set(data.get('stale', ()))
             
             # Save deaths
-            deaths_data = {
-                'lastUpdated': timestamp,
-                'world': 'Mystian',
-                'scraper': 'GitHub Actions',
-                'data': data['deaths']
-            }
-            with open('rubinot_deaths.json', 'w', encoding='utf-8') as f:
-                json.dump(deaths_data, f, indent=2, ensure_ascii=False)
+            if 'deaths' not in incomplete:
+                deaths_data = {
+                    'lastUpdated': timestamp,
+                    'world': 'Mystian',
+                    'scraper': 'GitHub Actions',
+                    'stale': 'deaths' in stale,
+                    'data': records_to_dicts(data['deaths'])
+                }
+                with open('rubinot_deaths.json', 'w', encoding='utf-8') as f:
+                    json.dump(deaths_data, f, indent=2, ensure_ascii=False)
             
             # Save online players
-            players_data = {
-                'lastUpdated': timestamp,
-                'world': 'Mystian', 
-                'scraper': 'GitHub Actions',
-                'data': data['online_players']
-            }
-            with open('rubinot_players.json', 'w', encoding='utf-8') as f:
-                json.dump(players_data, f, indent=2, ensure_ascii=False)
+            if 'online_players' not in incomplete:
+                players_data = {
+                    'lastUpdated': timestamp,
+                    'world': 'Mystian', 
+                    'scraper': 'GitHub Actions',
+                    'stale': 'players' in stale,
+                    'data': records_to_dicts(data['online_players'])
+                }
+                with open('rubinot_players.json', 'w', encoding='utf-8') as f:
+                    json.dump(players_data, f, indent=2, ensure_ascii=False)
             
             # Save level ups
-            levelups_data = {
-                'lastUpdated': timestamp,
-                'world': 'Mystian',
-                'scraper': 'GitHub Actions', 
-                'data': data['level_ups']
-            }
-            with open('rubinot_levelups.json', 'w', encoding='utf-8') as f:
-                json.dump(levelups_data, f, indent=2, ensure_ascii=False)
+            if 'level_ups' not in incomplete:
+                levelups_data = {
+                    'lastUpdated': timestamp,
+                    'world': 'Mystian',
+                    'scraper': 'GitHub Actions', 
+                    'data': records_to_dicts(data['level_ups'])
+                }
+                with open('rubinot_levelups.json', 'w', encoding='utf-8') as f:
+                    json.dump(levelups_data, f, indent=2, ensure_ascii=False)
             
             print(f"Saved {len(data['deaths'])} deaths, {len(data['online_players'])} players, {len(data['level_ups'])} level ups")
             
@@ -758,16 +983,141 @@ async def main():
     print("Starting RubinOT GitHub Actions scraper...")
     print(f"Timestamp: {datetime.now().isoformat()}")
     
-    # Load previous level data
+    scraper.parse_cache.load()
+    scraper.circuits.load()
+    
+    # Fast start: hash the raw pages before loading any heavy modules
+    # The pre-check only covers the deaths and players pages
+    if FAST_START and not JOB_RUNNER and not HIGHSCORES_ENABLED and pages_unchanged(scraper.parse_cache):
+        print("Pages unchanged since last run (pre-check), exiting early")
+        return
+    
+    # Open the connection to the site in the background while state loads
+    warm_up = asyncio.get_running_loop().run_in_executor(None, scraper.warm_up)
+    
+    # Load previous level data and killer statistics
     scraper.load_previous_levels()
+    scraper.killer_stats.load()
+    scraper.death_timeline.load()
+    scraper.correlator.load()
+    if GUILDS_ENABLED:
+        scraper.guilds.load()
+    scraper.watchlist = Watchlist.load()
+    scraper.online_history.open()
+    await warm_up
     
-    # Scrape all data
-    data = await scraper.scrape_mystian_data()
+    # The parse pool lives for the whole process, across daemon cycles
+    scraper.parse_pool.start()
+    if PROFILE and scraper.parse_pool.executor is not None:
+        print("Profiling: parsing runs in worker processes and is not sampled (set RUBINOT_PARSE_WORKERS=0)")
+    try:
+        while True:
+            with profile_run():
+                if JOB_RUNNER:
+                    await run_jobs(scraper)
+                else:
+                    await run_cycle(scraper)
+            if DAEMON_INTERVAL <= 0:
+                break
+            print(f"\nNext scrape in {DAEMON_INTERVAL}s")
+            await asyncio.sleep(DAEMON_INTERVAL)
+    finally:
+        scraper.parse_pool.shutdown()
+        scraper.online_history.close()
+        if scraper.session:
+            scraper.session.close()
+    
+    print("\nScraper complete!")
+
+async def run_jobs(scraper):
+    """Poll every configured world's pages from one scheduler
+    
+    As a daemon (RUBINOT_DAEMON_INTERVAL > 0) the scheduler keeps polling
+    until the run deadline. A one-shot run, as started by the workflow's
+    cron, fetches each page that is due once and exits, so runs do not
+    overlap the next scheduled one.
+    
+    Only records and per-world level and death state are written. The
+    single-world post-processing of run_cycle (killer stats, death
+    correlation, watchlist notifications, online history and guild
+    activity) does not run in this mode.
+    """
+    scraper.deadline = RunDeadline()
+    scraper.retry_budget = RetryBudget()
+    scraper.ttfb.reset()
+    scraper.setup_session()
+    
+    runner = JobRunner(world_jobs(), scraper.fetch_job, scraper.handle_job)
+    runner.load()
+    print("Job runner mode: killer stats, correlation, watchlist, online history and guild activity are skipped")
+    with profile_stage('jobs'):
+        await runner.run(scraper.deadline, once=DAEMON_INTERVAL <= 0)
+    runner.save()
+    scraper.circuits.save()
+    
+    with profile_stage('save'):
+        for state in scraper.worlds.values():
+            state.save()
+        if OUTPUT_FORMAT == 'segments':
+            scraper.history.compact()
+    if scraper.ttfb.samples:
+        print(f"Time to first byte: {scraper.ttfb.summary()}")
+
+async def run_cycle(scraper):
+    """Scrape once and save whatever changed"""
+    with profile_stage('scrape'):
+        data = await scraper.scrape_mystian_data()
+    scraper.parse_cache.save()
+    scraper.circuits.save()
+    
+    if data.get('stale'):
+        print(f"Serving stale results for: {', '.join(data['stale'])}")
+    if scraper.ttfb.samples:
+        print(f"Time to first byte: {scraper.ttfb.summary()}")
+    
+    # Only deaths the timeline has not seen before feed the statistics
+    new_deaths = scraper.death_timeline.merge(data['deaths'])
+    data['new_deaths'] = new_deaths
+    scraper.death_timeline.save()
+    if scraper.killer_stats.add_deaths(new_deaths):
+        scraper.killer_stats.save()
+    
+    # Join level losses with deaths of the same player
+    death_events = scraper.correlator.correlate(new_deaths, data.get('level_downs', []), capture_timestamp())
+    scraper.correlator.save()
+    if death_events:
+        save_death_events(death_events)
+        print(f"Correlated {len(death_events)} deaths with level losses")
+    
+    # Fresh player snapshots feed the downsampled online history, even when unchanged
+    players = data['online_players']
+    if players and 'players' not in data.get('stale', ()) and 'online_players' not in data.get('incomplete', ()):
+        scraper.online_history.update(players[0].timestamp // 1000, snapshot_values(players))
+    
+    # Per-guild activity for this scrape, straight from the roster indexes
+    if GUILDS_ENABLED:
+        scraper.guilds.save()
+        if scraper.guilds.member_guild:
+            save_guild_activity(scraper.guilds.activity(players, new_deaths, data['level_ups']))
+    
+    # Notify watchlist subscribers about new deaths and level ups
+    if scraper.watchlist.rules:
+        notifications = scraper.watchlist.notifications(new_deaths, data['level_ups'], scraper.guilds.guild_of)
+        save_notifications(notifications)
+        if notifications:
+            print(f"Queued {len(notifications)} watchlist notifications")
+    
+    if data.get('incomplete'):
+        print(f"Run deadline reached, saving partial results without: {', '.join(data['incomplete'])}")
     
     # Save results
-    if data['deaths'] or data['online_players'] or data['level_ups']:
-        scraper.save_data(data)
+    if data.get('unchanged'):
+        print("Pages unchanged since last run, nothing to save")
         scraper.save_previous_levels()
+    elif data['deaths'] or data['online_players'] or data['level_ups']:
+        with profile_stage('save'):
+            scraper.save_data(data)
+            scraper.save_previous_levels()
         
         print(f"\nScraping complete!")
         print(f"Results:")
@@ -778,11 +1128,15 @@ async def main():
         if data['level_ups']:
             print(f"\nRecent Level Ups:")
             for levelup in data['level_ups'][:5]:
-                print(f"   {levelup['player']}: {levelup['previous_level']} -> {levelup['new_level']} (+{levelup['level_gain']})")
+                print(f"   {levelup.player}: {levelup.previous_level} -> {levelup.new_level} (+{levelup.level_gain})")
+        
+        top_creatures = scraper.killer_stats.top_killers(3, min_level=500, kind='creature')
+        if top_creatures:
+            print(f"\nTop creatures vs level 500+ this week:")
+            for name, count in top_creatures:
+                print(f"   {name}: {count}")
     else:
         print("No data found")
-    
-    print("\nScraper complete!")
 
 if __name__ == "__main__":
     asyncio.run(main())import asyncio
@@ -798,22 +1152,29 @@ from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import subprocess
 import sys
+from rubinot_records import (
+    PlayerRecord, DeathRecord, LevelUpRecord, capture_timestamp, records_to_dicts
+)
+from rubinot_proxies import ProxyPool, TOR_PROXY
+from rubinot_connections import CHECK_EXIT_IP, TOR_NEWNYM, TTFBTracker
+from rubinot_state import ShardedLevels
 
 class TorRubinOTScraper:
     def __init__(self):
         self.deaths_data = []
         self.online_players = []
-        self.previous_levels = {}
+        self.previous_levels = ShardedLevels('Mystian')
         self.session = None
         self.tor_process = None
+        self.proxy_pool = None
+        self.ttfb = TTFBTracker()
         
     def start_tor(self):
         """Start Tor service if not already running"""
         try:
             # Check if Tor is already running
             response = requests.get('http://httpbin.org/ip', 
-                                  proxies={'http': 'socks5h://127.0.0.1:9050',
-                                          'https': 'socks5h://127.0.0.1:9050'},
+                                  proxies={'http': TOR_PROXY, 'https': TOR_PROXY},
                                   timeout=10)
             print("Tor is already running")
             return True
@@ -830,8 +1191,7 @@ class TorRubinOTScraper:
                 
                 # Test connection again
                 response = requests.get('http://httpbin.org/ip', 
-                                      proxies={'http': 'socks5h://127.0.0.1:9050',
-                                              'https': 'socks5h://127.0.0.1:9050'},
+                                      proxies={'http': TOR_PROXY, 'https': TOR_PROXY},
                                       timeout=10)
                 print(f"Tor started successfully. IP: {response.json()['origin']}")
                 return True
@@ -840,15 +1200,14 @@ class TorRubinOTScraper:
                 print(f"Failed to start Tor: {e}")
                 return False
     
-    def setup_session(self):
-        """Setup requests session with Tor proxy and retry logic"""
+    def setup_session(self, use_tor=True):
+        """Setup requests session with the proxy pool and retry logic"""
         self.session = requests.Session()
+        self.ttfb.install(self.session)
         
-        # Configure Tor proxy
-        self.session.proxies = {
-            'http': 'socks5h://127.0.0.1:9050',
-            'https': 'socks5h://127.0.0.1:9050'
-        }
+        # Requests are routed per call through the health-scored proxy pool
+        # (Tor plus any RUBINOT_PROXIES), not a fixed session proxy
+        self.proxy_pool = ProxyPool.from_env(include_tor=use_tor)
         
         # Set headers to appear more like a real browser
         self.session.headers.update({
@@ -871,7 +1230,8 @@ class TorRubinOTScraper:
             status_forcelist=[429, 500, 502, 503, 504],
         )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # Through proxies the pool fails over instead of retrying a slow exit
+        adapter = HTTPAdapter(max_retries=self.proxy_pool.adapter_retries(retry_strategy))
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
     
@@ -898,31 +1258,34 @@ class TorRubinOTScraper:
             print("Starting Tor-enabled scraper...")
             
             # Start Tor if needed
-            if not self.start_tor():
-                print("Failed to start Tor, using direct connection")
-                self.session = requests.Session()
-            else:
-                self.setup_session()
-            
-            # Test current IP
-            try:
-                ip_response = self.session.get('http://httpbin.org/ip', timeout=10)
-                print(f"Current IP: {ip_response.json()['origin']}")
-            except:
-                print("Could not determine current IP")
+            tor_running = self.start_tor()
+            if not tor_running:
+                print("Failed to start Tor, using configured proxies or a direct connection")
+            self.setup_session(use_tor=tor_running)
+            
+            # Test current IP (an extra round trip, so only on request)
+            if CHECK_EXIT_IP:
+                try:
+                    ip_response = self.proxy_pool.get(self.session, 'http://httpbin.org/ip', timeout=10)
+                    print(f"Current IP: {ip_response.json()['origin']}")
+                except:
+                    print("Could not determine current IP")
             
             # Scrape deaths first
             print("Scraping deaths...")
             deaths = await self.scrape_deaths()
             
-            # Get new Tor identity between requests
-            if hasattr(self, 'session') and self.session.proxies:
+            # A new Tor identity drops the warm circuit and connection, so it is opt-in
+            if TOR_NEWNYM and self.proxy_pool.includes(TOR_PROXY):
                 self.get_new_tor_identity()
             
             # Scrape online players
             print("Scraping online players...")
             players, level_ups = await self.scrape_online_players()
             
+            if self.ttfb.samples:
+                print(f"Time to first byte: {self.ttfb.summary()}")
+            
             return {
                 'deaths': deaths,
                 'online_players': players,
@@ -935,6 +1298,8 @@ class TorRubinOTScraper:
         finally:
             if self.session:
                 self.session.close()
+            if self.proxy_pool:
+                self.proxy_pool.save()
             if self.tor_process:
                 self.tor_process.terminate()
     
@@ -945,8 +1310,8 @@ class TorRubinOTScraper:
             await asyncio.sleep(random.uniform(2, 5))
             
             # Get the deaths page
-            response = self.session.get('https://rubinot.com.br/?subtopic=latestdeaths', 
-                                      timeout=30)
+            response = self.proxy_pool.get(self.session, 'https://rubinot.com.br/?subtopic=latestdeaths', 
+                                           timeout=30)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -967,7 +1332,7 @@ class TorRubinOTScraper:
                 # Wait before submitting form
                 await asyncio.sleep(random.uniform(1, 3))
                 
-                response = self.session.post(form_url, data=form_data, timeout=30)
+                response = self.proxy_pool.post(self.session, form_url, data=form_data, timeout=30)
                 response.raise_for_status()
                 soup = BeautifulSoup(response.content, 'html.parser')
             
@@ -984,14 +1349,15 @@ class TorRubinOTScraper:
             # Random delay between requests
             await asyncio.sleep(random.uniform(2, 5))
             
-            response = self.session.get('https://rubinot.com.br/?subtopic=worlds&world=Mystian', 
-                                      timeout=30)
+            response = self.proxy_pool.get(self.session, 'https://rubinot.com.br/?subtopic=worlds&world=Mystian', 
+                                           timeout=30)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
             
             players = []
             level_ups = []
+            captured_at = capture_timestamp()
             
             # Find the players table
             tables = soup.find_all('table')
@@ -1009,30 +1375,16 @@ class TorRubinOTScraper:
                                 current_level = int(level_text)
                                 
                                 if player_name and current_level > 0:
-                                    player_data = {
-                                        'name': player_name,
-                                        'level': current_level,
-                                        'vocation': vocation,
-                                        'timestamp': int(time.time() * 1000)
-                                    }
-                                    players.append(player_data)
+                                    players.append(PlayerRecord(player_name, current_level, vocation, captured_at))
                                     
                                     # Check for level changes
                                     if player_name in self.previous_levels:
                                         previous_level = self.previous_levels[player_name]
                                         if current_level > previous_level:
-                                            level_difference = current_level - previous_level
-                                            level_up = {
-                                                'player': player_name,
-                                                'previous_level': previous_level,
-                                                'new_level': current_level,
-                                                'level_gain': level_difference,
-                                                'vocation': vocation,
-                                                'timestamp': int(time.time() * 1000),
-                                                'id': f"{player_name}-{previous_level}-{current_level}-{int(time.time())}"
-                                            }
+                                            level_up = LevelUpRecord(player_name, previous_level, current_level,
+                                                                     vocation, captured_at)
                                             level_ups.append(level_up)
-                                            print(f"Level up detected: {player_name} {previous_level} -> {current_level} (+{level_difference})")
+                                            print(f"Level up detected: {player_name} {previous_level} -> {current_level} (+{level_up.level_gain})")
                                     
                                     # Update previous level
                                     self.previous_levels[player_name] = current_level
@@ -1053,6 +1405,7 @@ class TorRubinOTScraper:
     def parse_deaths_html(self, soup):
         """Parse deaths from HTML content"""
         deaths = []
+        captured_at = capture_timestamp()
         
         tables = soup.find_all('table')
         for table_idx, table in enumerate(tables):
@@ -1077,14 +1430,8 @@ class TorRubinOTScraper:
                         if killer.endswith('.'):
                             killer = killer[:-1]
                         
-                        death_data = {
-                            'player': player,
-                            'level': level,
-                            'killer': killer,
-                            'time': time_text,
-                            'timestamp': int(time.time() * 1000),
-                            'id': f"{player}-{level}-{killer}-{time_text}"
-                        }
+                        death_data = DeathRecord(player, level, killer, time_text, captured_at,
+                                                 f"{player}-{level}-{killer}-{time_text}")
                         deaths.append(death_data)
                         deaths_in_this_table += 1
                         
@@ -1097,24 +1444,19 @@ class TorRubinOTScraper:
         return deaths[:20]  # Return max 20 recent deaths
     
     def load_previous_levels(self):
-        """Load previous level data from file"""
-        try:
-            if os.path.exists('previous_levels.json'):
-                with open('previous_levels.json', 'r') as f:
-                    self.previous_levels = json.load(f)
-                    print(f"Loaded {len(self.previous_levels)} previous player levels")
-            else:
-                print("No previous levels file found, starting fresh")
-                self.previous_levels = {}
-        except Exception as e:
-            print(f"Error loading previous levels: {e}")
-            self.previous_levels = {}
+        """Open this world's sharded level state; shards load on first access"""
+        self.previous_levels = ShardedLevels('Mystian')
+        # One-time move of the old single-file state into the shards
+        self.previous_levels.migrate_legacy()
+        if not self.previous_levels.exists():
+            print("No previous levels found, starting fresh")
     
     def save_previous_levels(self):
-        """Save current level data for next run"""
+        """Save the level shards that changed for next run"""
         try:
-            with open('previous_levels.json', 'w') as f:
-                json.dump(self.previous_levels, f, indent=2)
+            saved = self.previous_levels.save()
+            if saved:
+                print(f"Saved {saved} changed level shards")
         except Exception as e:
             print(f"Error saving previous levels: {e}")
     
@@ -1125,7 +1467,7 @@ class TorRubinOTScraper:
             deaths_data = {
                 'lastUpdated': datetime.now().isoformat(),
                 'world': 'Mystian',
-                'data': data['deaths']
+                'data': records_to_dicts(data['deaths'])
             }
             with open('rubinot_deaths.json', 'w') as f:
                 json.dump(deaths_data, f, indent=2)
@@ -1134,7 +1476,7 @@ class TorRubinOTScraper:
             players_data = {
                 'lastUpdated': datetime.now().isoformat(),
                 'world': 'Mystian',
-                'data': data['online_players']
+                'data': records_to_dicts(data['online_players'])
             }
             with open('rubinot_players.json', 'w') as f:
                 json.dump(players_data, f, indent=2)
@@ -1143,7 +1485,7 @@ class TorRubinOTScraper:
             levelups_data = {
                 'lastUpdated': datetime.now().isoformat(),
                 'world': 'Mystian',
-                'data': data['level_ups']
+                'data': records_to_dicts(data['level_ups'])
             }
             with open('rubinot_levelups.json', 'w') as f:
                 json.dump(levelups_data, f, indent=2)
@@ -1178,7 +1520,7 @@ async def main():
         if data['level_ups']:
             print(f"\nRecent Level Ups:")
             for levelup in data['level_ups'][:5]:
-                print(f"   {levelup['player']}: {levelup['previous_level']} -> {levelup['new_level']} (+{levelup['level_gain']})")
+                print(f"   {levelup.player}: {levelup.previous_level} -> {levelup.new_level} (+{levelup.level_gain})")
     else:
         print("No data found")
     
@@ -0,0 +1,316 @@
+"""Golden-corpus check and throughput gate for the page parsers
+
+Every corpus/<kind>-<name>.html (or .html.gz) page is parsed with the
+matching rubinot_parsing function and compared field by field against
+corpus/<kind>-<name>.expected.json, then timed. Each page is timed against
+a fixed reference workload (plain BeautifulSoup over a generated page)
+in interleaved rounds, and the median ratio of the two is its score, so
+machine speed and load mostly cancel out. The run fails when a page's
+score falls more than TOLERANCE below corpus/baseline.json.
+
+    python bench_parser.py                     check and benchmark
+    python bench_parser.py --generate          rewrite the synthetic pages and their expected output
+    python bench_parser.py --update-expected   record current output for pages without expected output
+    python bench_parser.py --record-baseline   store the current scores as the baseline
+
+Real captures can be dropped into corpus/ under the same naming scheme;
+check their --update-expected output by hand before committing it.
+"""
+import contextlib
+import gzip
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from rubinot_parsing import parse_deaths_page, parse_players_page
+from rubinot_records import records_to_dicts
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+BASELINE_FILE = os.path.join(CORPUS_DIR, 'baseline.json')
+TOLERANCE = float(os.getenv('RUBINOT_BENCH_TOLERANCE', '0.4'))
+BENCH_ROUNDS = int(os.getenv('RUBINOT_BENCH_ROUNDS', '7'))
+REFERENCE_SEED = 1
+
+# Fixed capture time so record timestamps and ids are reproducible
+CAPTURED_AT = 1760000000000
+
+PARSERS = {
+    'deaths': parse_deaths_page,
+    'worlds': parse_players_page,
+}
+
+VOCATIONS = ['None', 'Knight', 'Elite Knight', 'Paladin', 'Royal Paladin', 'Sorcerer',
+             'Master Sorcerer', 'Druid', 'Elder Druid', 'Monk', 'Exalted Monk']
+CREATURES = ['a dragon lord', 'a demon', 'an undead dragon', 'a hydra', 'the ravennous hunger',
+             'a grim reaper', 'an elder wyrm', 'a rat', 'a cyclops smith', 'a juggernaut']
+SYLLABLES = ['ka', 'ro', 'mi', 'thar', 'zel', 'an', 'dra', 'vo', 'lis', 'gor', 'el', 'qu', 'ix', 'bel']
+
+
+def player_name(rng):
+    words = []
+    for _ in range(rng.choice((1, 2, 2, 3))):
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+        words.append(word.capitalize())
+    return ' '.join(words)
+
+
+def death_time(rng, index):
+    minutes = 14 * 60 + 59 - index * 3
+    return f"19.10.2025, {minutes // 60:02d}:{minutes % 60:02d}:{rng.randint(0, 59):02d}"
+
+
+def killer_cell(rng, players, link_players=True):
+    killers = []
+    for _ in range(rng.choice((1, 1, 2, 3, 4))):
+        if rng.random() < 0.3:
+            name = rng.choice(players)
+            killers.append(f'<a href="?subtopic=characters&name={name}">{name}</a>' if link_players else name)
+        else:
+            killers.append(rng.choice(CREATURES))
+    if len(killers) == 1:
+        return killers[0]
+    return ', '.join(killers[:-1]) + ' and ' + killers[-1]
+
+
+def page(body):
+    return (f'<!DOCTYPE html><html><head><title>RubinOT</title>'
+            f'<script>var loaded = "<table>";</script></head><body>'
+            f'<table class="menu"><tr><td>News</td><td>Community</td><td>Shop</td></tr></table>'
+            f'{body}<div class="footer">Page generated in 0.0123 seconds</div></body></html>')
+
+
+def deaths_page(rng, count, link_players=True):
+    players = [player_name(rng) for _ in range(40)]
+    rows = ['<tr><th>#</th><th>Time</th><th>Last Deaths</th></tr>']
+    for index in range(count):
+        name = rng.choice(players)
+        link = f'<a href="?subtopic=characters&name={name}">{name}</a>' if link_players else name
+        rows.append(f'<tr><td>{index + 1}.</td><td>{death_time(rng, index)}</td>'
+                    f'<td>{link} died at level {rng.randint(8, 1400)} by {killer_cell(rng, players, link_players)}.</td></tr>')
+    return page('<table class="TableContent">' + ''.join(rows) + '</table>')
+
+
+def deaths_odd_markup(rng):
+    """Uppercase tags, attributes, entities, nested inline tags, th cells, junk rows and a decoy table"""
+    players = [player_name(rng) for _ in range(15)]
+    rows = ['<TR><TH>#</TH><TH>Time</TH><TH>Death</TH></TR>']
+    for index in range(12):
+        name = rng.choice(players)
+        rows.append(f'<TR BGCOLOR="#F1E0C6"><TD WIDTH=20>{index + 1}</TD>'
+                    f'<TD NOWRAP>\n  {death_time(rng, index).replace(" ", "&nbsp;")}\n</TD>'
+                    f'<TD><A HREF="?name={name}"><span>{name}</span></A> Died At Level&nbsp;{rng.randint(8, 999)} '
+                    f'by <b>{killer_cell(rng, players)}</b></TD></TR>')
+    rows.append('<TR><TD></TD><TD>-</TD><TD>Server save</TD></TR>')
+    rows.append('<TR><TD COLSPAN=3>Nobody died at level x by nothing</TD></TR>')
+    rows.append(f'<TR><TH>13</TH><TH>{death_time(rng, 20)}</TH><TH>{players[0]} died at level 300 by a demon.</TH></TR>')
+    decoy = '<table><tr><td>Tip</td><td>Hunt safely</td><td>died at level?</td></tr></table>'
+    return page(decoy + '<!-- <table><tr><td>x died at level 1 by y</td></tr></table> -->'
+                '<TABLE>' + ''.join(rows) + '</TABLE>')
+
+
+def worlds_page(rng, count):
+    info = ('<table class="world-info"><tr><td>Status:</td><td>Online</td></tr>'
+            f'<tr><td>Players Online:</td><td>{count} Players Online</td></tr>'
+            '<tr><td>Location:</td><td>South America</td></tr></table>')
+    rows = ['<tr><th>Name</th><th>Level</th><th>Vocation</th></tr>']
+    names = set()
+    while len(names) < count:
+        names.add(player_name(rng) + ('' if rng.random() < 0.7 else f' {rng.choice(SYLLABLES)}'))
+    for name in sorted(names):
+        rows.append(f'<tr><td><a href="?subtopic=characters&name={name}">{name}</a></td>'
+                    f'<td>{rng.randint(8, 1500)}</td><td>{rng.choice(VOCATIONS)}</td></tr>')
+    return page(info + '<table class="players">' + ''.join(rows) + '</table>')
+
+
+def worlds_odd_markup(rng):
+    """Uppercase tags, padded cells, extra columns, non-numeric levels, blank names and level 0"""
+    rows = ['<TR CLASS="LabelH"><TD>Name</TD><TD>Level</TD><TD>Vocation</TD><TD>Flag</TD></TR>']
+    for _ in range(40):
+        rows.append(f'<TR><TD>  <A HREF="#">{player_name(rng)}</A>&nbsp;</TD><TD> {rng.randint(1, 999)} </TD>'
+                    f'<TD><i>{rng.choice(VOCATIONS)}</i></TD><TD><img src="br.png"></TD></TR>')
+    rows.append('<TR><TD>Ghost</TD><TD>n/a</TD><TD>Druid</TD></TR>')
+    rows.append('<TR><TD> </TD><TD>200</TD><TD>Knight</TD></TR>')
+    rows.append('<TR><TD>Zero</TD><TD>0</TD><TD>Knight</TD></TR>')
+    rows.append('<TR><TD COLSPAN=3>Total: 41</TD></TR>')
+    return page('<TABLE><TR><TD>Players Online</TD><TD>42</TD></TR></TABLE>'
+                '<TABLE>' + ''.join(rows) + '</TABLE>')
+
+
+def synthetic_pages():
+    """(file name, html) for every generated page; seeded so the corpus is reproducible"""
+    rng = random.Random(20251019)
+    return [
+        ('deaths-typical.html', deaths_page(rng, 20)),
+        ('deaths-unlinked.html', deaths_page(rng, 20, link_players=False)),
+        ('deaths-overflow.html', deaths_page(rng, 80)),
+        ('deaths-odd-markup.html', deaths_odd_markup(rng)),
+        ('deaths-empty.html', page('<table><tr><td>No deaths</td><td>yet</td><td>today</td></tr></table>')),
+        ('worlds-typical.html', worlds_page(rng, 300)),
+        ('worlds-huge.html.gz', worlds_page(rng, 6000)),
+        ('worlds-odd-markup.html', worlds_odd_markup(rng)),
+        ('worlds-offline.html', page('<table><tr><td>World</td><td>Mystian is offline</td></tr></table>')),
+    ]
+
+
+def corpus_pages():
+    """(name, kind, html path, expected path) for every page in the corpus"""
+    pages = []
+    for file_name in sorted(os.listdir(CORPUS_DIR)):
+        if not file_name.endswith(('.html', '.html.gz')):
+            continue
+        name = file_name.split('.html')[0]
+        kind = name.split('-', 1)[0]
+        if kind not in PARSERS:
+            print(f"Skipping {file_name}: unknown page kind '{kind}'")
+            continue
+        # Expected output of compressed pages is compressed too
+        expected = name + '.expected.json' + ('.gz' if file_name.endswith('.gz') else '')
+        pages.append((name, kind, os.path.join(CORPUS_DIR, file_name), os.path.join(CORPUS_DIR, expected)))
+    return pages
+
+
+def read_page(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        return f.read()
+
+
+def parse_quietly(kind, content):
+    # parse_deaths_page logs every death; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        records = PARSERS[kind](content, CAPTURED_AT)
+    return None if records is None else records_to_dicts(records)
+
+
+def reference_work(content):
+    """Fixed workload on the same library the parsers use: parse a page and read every cell"""
+    from bs4 import BeautifulSoup
+    return sum(len(cell.get_text()) for cell in BeautifulSoup(content, 'html.parser').find_all('td'))
+
+
+def reference_page():
+    return worlds_page(random.Random(REFERENCE_SEED), 300).encode('utf-8')
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def relative_speed(kind, content, reference):
+    """Median over rounds of reference time / page time, plus the median page time
+
+    The reference and the page are timed back to back in every round, so a
+    slower machine or a busy neighbour slows both down alike.
+    """
+    ratios = []
+    page_times = []
+    for _ in range(BENCH_ROUNDS):
+        reference_time = timed(reference_work, reference)
+        page_time = timed(parse_quietly, kind, content)
+        ratios.append(reference_time / page_time)
+        page_times.append(page_time)
+    return statistics.median(ratios), statistics.median(page_times)
+
+
+def read_json(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    if path.endswith('.gz'):
+        # mtime=0 keeps regenerated archives byte-identical
+        with open(path, 'wb') as f, gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as gz:
+            gz.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def generate():
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    generated = set()
+    for file_name, html in synthetic_pages():
+        path = os.path.join(CORPUS_DIR, file_name)
+        if file_name.endswith('.gz'):
+            # mtime=0 keeps regenerated archives byte-identical
+            with open(path, 'wb') as f, gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as gz:
+                gz.write(html.encode('utf-8'))
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(html)
+        generated.add(path)
+        print(f"Generated {file_name}")
+
+    for name, kind, path, expected_path in corpus_pages():
+        if path in generated:
+            write_json(expected_path, parse_quietly(kind, read_page(path)))
+
+
+def main():
+    if '--generate' in sys.argv:
+        generate()
+
+    update_expected = '--update-expected' in sys.argv
+    record_baseline = '--record-baseline' in sys.argv
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    failures = []
+    scores = {}
+    reference = reference_page()
+    for name, kind, path, expected_path in corpus_pages():
+        content = read_page(path)
+        records = parse_quietly(kind, content)
+
+        if not os.path.exists(expected_path):
+            if update_expected:
+                write_json(expected_path, records)
+                print(f"{name}: recorded expected output")
+            else:
+                failures.append(f"{name}: no expected output (run with --update-expected)")
+                continue
+        else:
+            expected = read_json(expected_path)
+            if records != expected:
+                failures.append(f"{name}: parsed records differ from {os.path.basename(expected_path)}")
+                continue
+
+        count = len(records or ())
+        if not count:
+            print(f"{name}: ok (no records)")
+            continue
+        score, page_time = relative_speed(kind, content, reference)
+        scores[name] = float(f"{score:.4g}")
+        floor = baseline.get(name, 0) * (1 - TOLERANCE)
+        status = 'ok'
+        if not record_baseline and score < floor:
+            status = 'SLOW'
+            failures.append(f"{name}: score {score:.4g} is below the baseline {baseline[name]} - {TOLERANCE:.0%}")
+        print(f"{name}: {status}, {count} records, {count / page_time:,.0f} records/s, "
+              f"score {score:.4g} (baseline {baseline.get(name, 'none')})")
+
+    if record_baseline:
+        write_json(BASELINE_FILE, scores)
+        print(f"Recorded baseline for {len(scores)} pages")
+
+    if failures:
+        print("\nFailed:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print("\nAll corpus pages parsed as expected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import subprocess
+import sys
+import time
+
+# Modules the full scrape needs versus what the fast-start pre-check imports
+HEAVY_MODULES = ['requests', 'urllib3', 'bs4']
+FAST_PATH_MODULES = ['rubinot_precheck']
+
+
+def measure_interpreter(runs=5):
+    """Best-of-N wall time for a bare interpreter start"""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_imports(module):
+    """Run `python -X importtime` for one module and return (cumulative us, top entries)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, []
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        entries.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+
+    total = next((entry[0] for entry in entries if entry[2] == module), 0)
+    return total, sorted(entries, reverse=True)[:5]
+
+def main():
+    print(f"Interpreter startup: {measure_interpreter() * 1000:.1f} ms")
+
+    for label, modules in (('Full scrape', HEAVY_MODULES), ('Fast-start pre-check', FAST_PATH_MODULES)):
+        print(f"\n{label} imports:")
+        for module in modules:
+            total, top = measure_imports(module)
+            if total is None:
+                print(f"   {module}: not installed")
+                continue
+            print(f"   {module}: {total / 1000:.1f} ms cumulative")
+            for cumulative_us, self_us, name in top:
+                print(f"      {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:.1f} ms) {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
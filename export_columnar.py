@@ -0,0 +1,366 @@
+"""Export accumulated scrape history to partitioned columnar files
+
+Reads every source of history that exists and writes one dataset per table
+(players, levelups, deaths) under <out>/<table>/world=<world>/day=<YYYY-MM-DD>/,
+as Parquet or Arrow IPC files. Rows are buffered per partition and written
+in batches of --batch-rows, and a partition is closed once rows for a
+later day arrive, so memory and open files stay bounded however much
+history there is. Deaths and level ups are deduplicated by id within a
+sliding window of recent ids.
+
+Compacted player history only keeps per-player summaries, not snapshots;
+those go to a separate player_summaries table.
+
+Sources:
+    rubinot_*.ndjson[.gz] and their rotated backups (RUBINOT_OUTPUT_FORMAT=ndjson)
+    history/<stream>/ segments and archives (RUBINOT_OUTPUT_FORMAT=segments)
+    with --git, every committed version of rubinot_{players,levelups,deaths}.json
+
+    python export_columnar.py --git --format parquet --out export
+
+Needs pyarrow (pip install pyarrow).
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import shutil
+import subprocess
+from collections import deque
+
+from rubinot_history import HISTORY_DIR, PLAYER_COLUMNS, player_rows
+from rubinot_stats import day_bucket
+
+DEFAULT_WORLD = 'Mystian'
+BATCH_ROWS = 50000
+# Repeats of a death or level up sit close together in the sources (each
+# deaths page repeats the latest 20), so a window of recent keys is enough
+DEDUP_WINDOW = 100000
+
+JSON_FILES = {
+    'players': 'rubinot_players.json',
+    'levelups': 'rubinot_levelups.json',
+    'deaths': 'rubinot_deaths.json',
+}
+NDJSON_PREFIXES = {
+    'players': 'rubinot_players',
+    'levelups': 'rubinot_levelups',
+    'deaths': 'rubinot_deaths',
+}
+
+
+def load_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Columnar export needs the 'pyarrow' package (pip install pyarrow)")
+    return pyarrow
+
+
+def table_schemas(pa):
+    """Column schema per table; world and day are partition directories, not columns"""
+    return {
+        'players': pa.schema([
+            ('timestamp', pa.int64()),
+            ('name', pa.string()),
+            ('level', pa.int32()),
+            ('vocation', pa.string()),
+        ]),
+        'levelups': pa.schema([
+            ('timestamp', pa.int64()),
+            ('player', pa.string()),
+            ('previous_level', pa.int32()),
+            ('new_level', pa.int32()),
+            ('level_gain', pa.int32()),
+            ('vocation', pa.string()),
+            ('id', pa.string()),
+        ]),
+        'player_summaries': pa.schema([
+            ('first_seen', pa.int64()),
+            ('last_seen', pa.int64()),
+            ('name', pa.string()),
+            ('min_level', pa.int32()),
+            ('max_level', pa.int32()),
+            ('vocation', pa.string()),
+            ('samples', pa.int32()),
+        ]),
+        'deaths': pa.schema([
+            ('timestamp', pa.int64()),
+            ('death_timestamp', pa.int64()),
+            ('player', pa.string()),
+            ('level', pa.int32()),
+            ('killer', pa.string()),
+            ('killers', pa.list_(pa.struct([('name', pa.string()), ('player', pa.bool_())]))),
+            ('time', pa.string()),
+            ('id', pa.string()),
+        ]),
+    }
+
+
+class RecentKeys:
+    """Set of the last `size` keys seen, for bounded-memory deduplication"""
+
+    def __init__(self, size=DEDUP_WINDOW):
+        self.order = deque()
+        self.keys = set()
+        self.size = size
+
+    def seen(self, key):
+        if key in self.keys:
+            return True
+        self.keys.add(key)
+        self.order.append(key)
+        if len(self.order) > self.size:
+            self.keys.discard(self.order.popleft())
+        return False
+
+
+class PartitionedWriter:
+    """Buffers rows per (world, day) partition and streams them out in record batches"""
+
+    def __init__(self, pa, out_dir, table, schema, file_format='parquet', batch_rows=BATCH_ROWS):
+        self.pa = pa
+        self.directory = os.path.join(out_dir, table)
+        self.schema = schema
+        self.file_format = file_format
+        self.batch_rows = batch_rows
+        self.buffers = {}
+        self.writers = {}
+        self.parts = {}
+        self.current_day = None
+        self.rows = 0
+
+    def open_writer(self, world, day):
+        directory = os.path.join(self.directory, f"world={world}", f"day={day}")
+        os.makedirs(directory, exist_ok=True)
+        # A partition reopened for late rows gets a new part file
+        part = self.parts.get((world, day), 0)
+        self.parts[(world, day)] = part + 1
+        if self.file_format == 'parquet':
+            return self.pa.parquet.ParquetWriter(os.path.join(directory, f"part-{part}.parquet"), self.schema)
+        return self.pa.ipc.new_file(os.path.join(directory, f"part-{part}.arrow"), self.schema)
+
+    def add(self, world, day, row):
+        if day != self.current_day:
+            self.close_before(day)
+            self.current_day = day
+        key = (world, day)
+        buffer = self.buffers.setdefault(key, [])
+        buffer.append(row)
+        self.rows += 1
+        if len(buffer) >= self.batch_rows:
+            self.flush(key)
+
+    def flush(self, key):
+        rows = self.buffers.pop(key, None)
+        if not rows:
+            return
+        if key not in self.writers:
+            self.writers[key] = self.open_writer(*key)
+        batch = self.pa.RecordBatch.from_pylist(rows, schema=self.schema)
+        self.writers[key].write_batch(batch)
+
+    def close_partition(self, key):
+        self.flush(key)
+        writer = self.writers.pop(key, None)
+        if writer is not None:
+            writer.close()
+
+    def close_before(self, day):
+        """Close every partition of an earlier day; each source yields rows roughly in day order"""
+        for key in [key for key in set(self.buffers) | set(self.writers) if key[1] < day]:
+            self.close_partition(key)
+
+    def close(self):
+        for key in set(self.buffers) | set(self.writers):
+            self.close_partition(key)
+
+
+def read_ndjson(path):
+    if path.endswith('.zst'):
+        import io
+        import zstandard
+        # Every run appended its own zstd frame
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+        stream = io.TextIOWrapper(raw, encoding='utf-8')
+    elif path.endswith('.gz'):
+        stream = gzip.open(path, 'rt', encoding='utf-8')
+    else:
+        stream = open(path, 'r', encoding='utf-8')
+    with stream as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def git_versions(path):
+    """Every committed version of a JSON file, oldest first, read one blob at a time"""
+    commits = subprocess.run(['git', 'log', '--reverse', '--format=%H', '--', path],
+                             capture_output=True, text=True, check=True).stdout.split()
+    if not commits:
+        return
+    cat_file = subprocess.Popen(['git', 'cat-file', '--batch'], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        for commit in commits:
+            cat_file.stdin.write(f"{commit}:{path}\n".encode())
+            cat_file.stdin.flush()
+            header = cat_file.stdout.readline().split()
+            if len(header) < 3 or header[1] == b'missing':
+                continue
+            blob = cat_file.stdout.read(int(header[2]))
+            cat_file.stdout.read(1)
+            try:
+                yield json.loads(blob)
+            except ValueError:
+                continue
+    finally:
+        cat_file.stdin.close()
+        cat_file.wait()
+
+
+def json_document_rows(document):
+    """Rows of one rubinot_<table>.json document, tagged with its world"""
+    world = document.get('world', DEFAULT_WORLD)
+    for row in document.get('data', []):
+        yield dict(row, world=row.get('world', world))
+
+
+# Second-tier files (merged archives) hold older history than the segment archives
+ARCHIVE_PATTERNS = ('month-*.json.gz', 'rolling-*.json.gz', 'archive-*.json.gz')
+
+
+def archive_paths(directory):
+    return [path for pattern in ARCHIVE_PATTERNS
+            for path in sorted(glob.glob(os.path.join(directory, pattern)))]
+
+
+def archives(directory):
+    for path in archive_paths(directory):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            yield json.load(f)['summary']
+
+
+def player_summary_rows(history_dir):
+    """Per-player rows from compacted players archives, whose snapshots are gone"""
+    for summary in archives(os.path.join(history_dir, 'players')):
+        for values in player_rows(summary):
+            row = dict(zip(PLAYER_COLUMNS, values))
+            row['timestamp'] = row['last_seen']
+            yield row
+
+
+def history_rows(table, history_dir):
+    """Events from history segments and, for deaths and level ups, their compacted archives"""
+    if table == 'player_summaries':
+        yield from player_summary_rows(history_dir)
+        return
+    directory = os.path.join(history_dir, table)
+    if table != 'players':
+        for summary in archives(directory):
+            yield from summary
+    for path in sorted(glob.glob(os.path.join(directory, 'segment-*.ndjson'))):
+        for row in read_ndjson(path):
+            if table == 'players':
+                # Segments store one compact row per snapshot
+                for name, level, vocation in row['players']:
+                    yield {'world': row['world'], 'timestamp': row['t'], 'name': name,
+                           'level': level, 'vocation': vocation}
+            else:
+                yield row
+
+
+def rotation_index(path):
+    """0 for the live NDJSON file, N for its .N. rotated backup"""
+    part = os.path.basename(path).split('.')[1]
+    return int(part) if part.isdigit() else 0
+
+
+def source_rows(table, use_git, history_dir):
+    """Rows from every source, each source roughly oldest first"""
+    if table not in NDJSON_PREFIXES:
+        yield from history_rows(table, history_dir)
+        return
+    if use_git:
+        for document in git_versions(JSON_FILES[table]):
+            yield from json_document_rows(document)
+    prefix = NDJSON_PREFIXES[table]
+    paths = glob.glob(f"{prefix}.*.ndjson*") + glob.glob(f"{prefix}.ndjson*")
+    # Rotated backups hold older lines: highest number first
+    for path in sorted(paths, key=rotation_index, reverse=True):
+        yield from read_ndjson(path)
+    yield from history_rows(table, history_dir)
+
+
+def partition_day(table, row):
+    if table == 'deaths':
+        return day_bucket(row.get('death_timestamp') or row['timestamp'])
+    return day_bucket(row['timestamp'])
+
+
+def event_key(table, row):
+    """Identity of a death or level up that is the same in every source
+
+    Older commits built death ids from the scrape time, so a death kept its
+    place on the latest deaths page but got a new id every run. Deaths are
+    keyed on what the page shows instead, like rubinot_timeline.stable_key.
+    """
+    if table == 'deaths':
+        time_text = row.get('time')
+        when = time_text if time_text and time_text != 'Unknown' else row.get('killer')
+        return (row.get('world', DEFAULT_WORLD), row['player'], row['level'], when)
+    return row['id']
+
+
+def export_rows(table, args):
+    """(world, day, row) for every row of a table, events deduplicated, oldest sources first"""
+    # Each player snapshot is stored once per source, so only events need deduplication
+    recent = RecentKeys() if table in ('levelups', 'deaths') else None
+    for row in source_rows(table, args.git, args.history_dir):
+        if recent is not None and recent.seen(event_key(table, row)):
+            continue
+        day = partition_day(table, row)
+        if args.since and day < args.since:
+            continue
+        yield row.get('world', DEFAULT_WORLD), day, row
+
+
+def export_table(pa, table, schema, args):
+    target = os.path.join(args.out, table)
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    writer = PartitionedWriter(pa, args.out, table, schema, args.format, args.batch_rows)
+    try:
+        for world, day, row in export_rows(table, args):
+            writer.add(world, day, {name: row.get(name) for name in schema.names})
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export scrape history to partitioned Parquet/Arrow files")
+    parser.add_argument('--format', choices=('parquet', 'arrow'), default='parquet')
+    parser.add_argument('--out', default='export')
+    parser.add_argument('--git', action='store_true', help="include every committed version of the JSON outputs")
+    parser.add_argument('--history-dir', default=HISTORY_DIR)
+    parser.add_argument('--since', help="only export days on or after YYYY-MM-DD")
+    parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS)
+    parser.add_argument('--tables', default='players,player_summaries,levelups,deaths')
+    args = parser.parse_args()
+
+    pa = load_pyarrow()
+    schemas = table_schemas(pa)
+    archived = archive_paths(os.path.join(args.history_dir, 'players'))
+    if archived and 'players' in args.tables.split(',') and 'player_summaries' not in args.tables.split(','):
+        print(f"Warning: {len(archived)} compacted players archives only hold summaries and are left out "
+              f"of the players table; add player_summaries to --tables to export them")
+    for table in args.tables.split(','):
+        rows = export_table(pa, table, schemas[table], args)
+        print(f"Exported {rows} {table} rows to {os.path.join(args.out, table)}")
+
+
+if __name__ == "__main__":
+    main()
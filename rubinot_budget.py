@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+
+# The workflow's timeout-minutes is 10; leave room for setup and the commit step
+RUN_DEADLINE = float(os.getenv('RUBINOT_RUN_DEADLINE', '420'))
+RETRY_BUDGET = int(os.getenv('RUBINOT_RETRY_BUDGET', '6'))
+REQUEST_TIMEOUT = 30
+
+
+class RunDeadline:
+    """Wall-clock deadline for one scrape run, sliced between its stages"""
+
+    def __init__(self, seconds=RUN_DEADLINE):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def stage_timeout(self, stages_left):
+        """Fair share of the remaining time for the next of `stages_left` stages"""
+        return self.remaining() / max(1, stages_left)
+
+    def request_timeout(self, cap=REQUEST_TIMEOUT):
+        """Per-request timeout that never outlives the run"""
+        return max(1.0, min(cap, self.remaining()))
+
+
+class RetryBudget:
+    """Retries shared by every request in a run, so one bad endpoint cannot spend them all on backoff"""
+
+    def __init__(self, retries=RETRY_BUDGET):
+        self.remaining = retries
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def budgeted_retry(budget, deadline, **kwargs):
+    """Build a urllib3 Retry that draws from the run's retry budget and deadline"""
+    from urllib3.exceptions import MaxRetryError, ResponseError
+    from urllib3.util.retry import Retry
+
+    class BudgetedRetry(Retry):
+        def __init__(self, *args, budget=None, deadline=None, **kw):
+            super().__init__(*args, **kw)
+            self.budget = budget
+            self.deadline = deadline
+
+        def new(self, **kw):
+            retry = super().new(**kw)
+            retry.budget = self.budget
+            retry.deadline = self.deadline
+            return retry
+
+        def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+            if self.deadline.expired or not self.budget.take():
+                reason = error or ResponseError("run retry budget or deadline exhausted")
+                raise MaxRetryError(_pool, url, reason) from reason
+            return super().increment(method, url, response, error, _pool, _stacktrace)
+
+        def get_backoff_time(self):
+            # Never sleep past the end of the run
+            return min(super().get_backoff_time(), self.deadline.remaining())
+
+    return BudgetedRetry(budget=budget, deadline=deadline, **kwargs)
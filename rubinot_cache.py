@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import re
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+CACHE_FILE = 'parse_cache.json'
+
+# Markup that changes between requests without touching the scraped tables
+VOLATILE_PATTERNS = [
+    re.compile(rb'<script\b.*?</script>', re.IGNORECASE | re.DOTALL),
+    re.compile(rb'<!--.*?-->', re.DOTALL),
+    re.compile(rb'<input[^>]+type=["\']?hidden[^>]*>', re.IGNORECASE),
+    re.compile(rb'(?:page\s+generated|server\s+time|rendered)\s+in[^<]*', re.IGNORECASE),
+]
+WHITESPACE = re.compile(rb'\s+')
+
+TABLE = re.compile(rb'<table\b.*?</table>', re.IGNORECASE | re.DOTALL)
+ROW = re.compile(rb'<tr\b.*?</tr>', re.IGNORECASE | re.DOTALL)
+CELL = re.compile(rb'<t[dh]\b[^>]*>(.*?)</t[dh]>', re.IGNORECASE | re.DOTALL)
+TAG = re.compile(rb'<[^>]+>')
+# Same test as the deaths parser's pattern, on raw bytes (&nbsp; included)
+DEATH_TEXT = re.compile(rb'died(?:\s|&nbsp;)+at(?:\s|&nbsp;)+level(?:\s|&nbsp;)+\d', re.IGNORECASE)
+
+
+def data_tables(content):
+    """The tables the parsers read: every table with a death line, else the first players table
+
+    Mirrors parse_deaths_soup and parse_players_soup (a table whose second
+    row has a level number in its second cell), so menus, sidebars and
+    counters around the data do not change the hash.
+    """
+    tables = TABLE.findall(content)
+    deaths = [table for table in tables if DEATH_TEXT.search(TAG.sub(b'', table))]
+    if deaths:
+        return deaths
+    for table in tables:
+        rows = ROW.findall(table)
+        if len(rows) > 1:
+            cells = CELL.findall(rows[1])
+            if len(cells) >= 3 and TAG.sub(b'', cells[1]).strip().isdigit():
+                return [table]
+    return None
+
+
+def normalize_section(content):
+    """Reduce a response body to the tables that the parsers read"""
+    for pattern in VOLATILE_PATTERNS:
+        content = pattern.sub(b'', content)
+    tables = data_tables(content)
+    if tables:
+        content = b''.join(tables)
+    else:
+        # Unrecognised page: fall back to everything from the first to the last table
+        start = content.find(b'<table')
+        end = content.rfind(b'</table>')
+        if start != -1 and end > start:
+            content = content[start:end + len(b'</table>')]
+    return WHITESPACE.sub(b' ', content)
+
+
+def body_hash(content):
+    """Fast digest of the normalized relevant section of a page"""
+    section = normalize_section(content)
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(section)
+    return hashlib.blake2b(section, digest_size=16).hexdigest()
+
+
+class ParseCache:
+    """Last parse result per page, keyed by the hash of its body"""
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+        except Exception as e:
+            print(f"Error loading parse cache: {e}")
+            self.entries = {}
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, separators=(',', ':'))
+            self.dirty = False
+        except Exception as e:
+            print(f"Error saving parse cache: {e}")
+
+    def lookup(self, page, digest):
+        """Return the cached rows for a page if its body hash is unchanged"""
+        entry = self.entries.get(page)
+        if entry and entry.get('hash') == digest:
+            return entry['records']
+        return None
+
+    def last_good(self, page):
+        """Rows from the last successful parse of a page, whatever its hash"""
+        entry = self.entries.get(page)
+        return entry['records'] if entry else None
+
+    def store(self, page, digest, records):
+        self.entries[page] = {
+            'hash': digest,
+            'records': [record.to_dict() for record in records]
+        }
+        self.dirty = True
@@ -0,0 +1,97 @@
+import json
+import os
+import time
+
+CIRCUIT_FILE = 'circuit_state.json'
+FAILURE_THRESHOLD = int(os.getenv('RUBINOT_CIRCUIT_FAILURES', '3'))
+COOLDOWN_SECONDS = float(os.getenv('RUBINOT_CIRCUIT_COOLDOWN', '900'))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one endpoint
+
+    After FAILURE_THRESHOLD consecutive failures the circuit opens and
+    requests are skipped for COOLDOWN_SECONDS. The first request after the
+    cooldown is a half-open probe: success closes the circuit, failure opens
+    it for another cooldown.
+    """
+
+    def __init__(self, state=CLOSED, failures=0, opened_at=0.0):
+        self.state = state
+        self.failures = failures
+        self.opened_at = opened_at
+
+    def allow_request(self):
+        if self.state == OPEN:
+            if time.time() - self.opened_at < COOLDOWN_SECONDS:
+                return False
+            self.state = HALF_OPEN
+        return True
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= FAILURE_THRESHOLD:
+            self.state = OPEN
+            self.opened_at = time.time()
+
+    def to_dict(self):
+        return {'state': self.state, 'failures': self.failures, 'opened_at': self.opened_at}
+
+
+class CircuitBoard:
+    """Breakers per endpoint, persisted between runs"""
+
+    def __init__(self, path=CIRCUIT_FILE):
+        self.path = path
+        self.breakers = {}
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.breakers = {name: CircuitBreaker(**state) for name, state in json.load(f).items()}
+        except Exception as e:
+            print(f"Error loading circuit state: {e}")
+            self.breakers = {}
+
+    def save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({name: breaker.to_dict() for name, breaker in self.breakers.items()}, f, indent=2)
+        except Exception as e:
+            print(f"Error saving circuit state: {e}")
+
+    def get(self, endpoint):
+        if endpoint not in self.breakers:
+            self.breakers[endpoint] = CircuitBreaker()
+        return self.breakers[endpoint]
+
+    def is_open(self, endpoint):
+        """True while the endpoint's circuit is open and still cooling down"""
+        breaker = self.get(endpoint)
+        return breaker.state == OPEN and time.time() - breaker.opened_at < COOLDOWN_SECONDS
+
+    def allow_request(self, endpoint):
+        allowed = self.get(endpoint).allow_request()
+        if not allowed:
+            print(f"Circuit open for {endpoint}, skipping request")
+        elif self.get(endpoint).state == HALF_OPEN:
+            print(f"Circuit half-open for {endpoint}, probing")
+        return allowed
+
+    def record_success(self, endpoint):
+        self.get(endpoint).record_success()
+
+    def record_failure(self, endpoint):
+        breaker = self.get(endpoint)
+        breaker.record_failure()
+        if breaker.state == OPEN:
+            print(f"Circuit opened for {endpoint} after {breaker.failures} failures")
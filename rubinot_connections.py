@@ -0,0 +1,66 @@
+import os
+import socket
+import time
+import urllib.parse
+
+SITE_URL = 'https://rubinot.com.br/'
+WARM_UP_TIMEOUT = 10
+
+# Tor scrapers: both extra steps cost a round trip (and NEWNYM a fresh
+# circuit plus a 5s wait), so they are off unless asked for
+TOR_NEWNYM = os.getenv('RUBINOT_TOR_NEWNYM', '').lower() in ('1', 'true', 'yes')
+CHECK_EXIT_IP = os.getenv('RUBINOT_CHECK_EXIT_IP', '').lower() in ('1', 'true', 'yes')
+
+
+def pre_resolve(url=SITE_URL):
+    """Resolve the site's host ahead of the first request so the lookup is cached locally"""
+    parts = urllib.parse.urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    try:
+        return socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except OSError as e:
+        print(f"Could not pre-resolve {parts.hostname}: {e}")
+        return []
+
+
+def pre_connect(session, url=SITE_URL, timeout=WARM_UP_TIMEOUT):
+    """Open a kept-alive TCP+TLS connection in the session's pool with a cheap HEAD request"""
+    start = time.monotonic()
+    try:
+        session.head(url, timeout=timeout, allow_redirects=False)
+    except Exception as e:
+        print(f"Connection warm-up failed: {e}")
+        return None
+    return time.monotonic() - start
+
+
+def page_key(url):
+    """Short label for a URL: its subtopic, or its path"""
+    parts = urllib.parse.urlsplit(url)
+    subtopic = urllib.parse.parse_qs(parts.query).get('subtopic')
+    return subtopic[0] if subtopic else (parts.path or '/')
+
+
+class TTFBTracker:
+    """Time to first byte per page, collected through a requests response hook
+
+    response.elapsed runs from sending the request until the response
+    headers are parsed, so it covers connect (when not reused), TLS and
+    server time but not the body download.
+    """
+
+    def __init__(self):
+        self.samples = {}
+
+    def install(self, session):
+        session.hooks['response'].append(self.hook)
+
+    def hook(self, response, *args, **kwargs):
+        self.samples.setdefault(page_key(response.url), []).append(response.elapsed.total_seconds())
+
+    def reset(self):
+        self.samples = {}
+
+    def summary(self):
+        return ', '.join(f"{page} {'/'.join(f'{elapsed * 1000:.0f}' for elapsed in times)}ms"
+                         for page, times in self.samples.items())
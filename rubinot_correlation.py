@@ -0,0 +1,128 @@
+import json
+import os
+
+from rubinot_output import NDJSONWriter
+from rubinot_records import DeathRecord, LevelDownRecord
+from rubinot_timeline import death_time
+
+CORRELATION_FILE = 'correlation_state.json'
+# Append-only NDJSON stream, like the notifications
+DEATH_EVENTS_STREAM = 'rubinot_death_events'
+# A level loss is usually seen on the next players snapshot after the death,
+# but a player who logs out on death only shows it when they log back in
+CORRELATION_WINDOW_MS = int(float(os.getenv('RUBINOT_CORRELATION_WINDOW_MINUTES', '360')) * 60 * 1000)
+
+
+def enriched_death(death, level_down):
+    """Death event with the levels the player lost"""
+    event = death.to_dict()
+    event.update({
+        'level_before': level_down.previous_level,
+        'level_after': level_down.new_level,
+        'levels_lost': level_down.level_loss,
+        'level_down_seen': level_down.timestamp
+    })
+    return event
+
+
+class DeathCorrelator:
+    """Joins level decreases with deaths of the same player within a time window
+
+    Unmatched deaths and level losses wait, keyed by player, for their
+    counterpart from a later cycle until they fall out of the window. Each
+    new death or level loss costs one dict lookup plus a scan of that
+    player's few pending entries.
+    """
+
+    def __init__(self, path=CORRELATION_FILE, window_ms=CORRELATION_WINDOW_MS):
+        self.path = path
+        self.window_ms = window_ms
+        self.deaths = {}
+        self.level_downs = {}
+        self.dirty = False
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                for row in saved.get('deaths', []):
+                    self.deaths.setdefault(row['player'], []).append(DeathRecord.from_dict(row))
+                for row in saved.get('level_downs', []):
+                    self.level_downs.setdefault(row['player'], []).append(LevelDownRecord.from_dict(row))
+        except Exception as e:
+            print(f"Error loading correlation state: {e}")
+            self.deaths, self.level_downs = {}, {}
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'deaths': [death.to_dict() for deaths in self.deaths.values() for death in deaths],
+                    'level_downs': [down.to_dict() for downs in self.level_downs.values() for down in downs]
+                }, f, ensure_ascii=False, separators=(',', ':'))
+            self.dirty = False
+        except Exception as e:
+            print(f"Error saving correlation state: {e}")
+
+    def matches(self, death, level_down):
+        # The player ends below the level they died at, seen near the death
+        # (previous_level may predate level ups made just before dying)
+        return (level_down.new_level < death.level
+                and abs(level_down.timestamp - death_time(death)) <= self.window_ms)
+
+    def take(self, pending, player, predicate):
+        """Remove and return the first pending entry for `player` that satisfies `predicate`"""
+        entries = pending.get(player)
+        if not entries:
+            return None
+        for index, entry in enumerate(entries):
+            if predicate(entry):
+                del entries[index]
+                if not entries:
+                    del pending[player]
+                return entry
+        return None
+
+    def correlate(self, new_deaths, level_downs, now):
+        """Enriched death events for this cycle's new deaths and level losses"""
+        events = []
+        for death in new_deaths:
+            level_down = self.take(self.level_downs, death.player, lambda down: self.matches(death, down))
+            if level_down is None:
+                self.deaths.setdefault(death.player, []).append(death)
+            else:
+                events.append(enriched_death(death, level_down))
+
+        for level_down in level_downs:
+            death = self.take(self.deaths, level_down.player, lambda death: self.matches(death, level_down))
+            if death is None:
+                self.level_downs.setdefault(level_down.player, []).append(level_down)
+            else:
+                events.append(enriched_death(death, level_down))
+
+        self.expire(now)
+        self.dirty = self.dirty or bool(new_deaths or level_downs or events)
+        return events
+
+    def expire(self, now):
+        """Drop pending entries that can no longer be matched"""
+        cutoff = now - self.window_ms
+        for pending, when in ((self.deaths, death_time), (self.level_downs, lambda down: down.timestamp)):
+            for player in list(pending):
+                kept = [entry for entry in pending[player] if when(entry) >= cutoff]
+                if kept:
+                    pending[player] = kept
+                else:
+                    del pending[player]
+
+
+def save_death_events(events, path=DEATH_EVENTS_STREAM):
+    """Append a run's enriched death events to the death events stream; returns how many"""
+    try:
+        return NDJSONWriter(path).write_rows(events) if events else 0
+    except Exception as e:
+        print(f"Error saving death events: {e}")
+        return 0
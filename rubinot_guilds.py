@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import time
+import urllib.parse
+
+from rubinot_parsing import parse_guild_list_page, parse_guild_members_page
+
+GUILDS_ENABLED = os.getenv('RUBINOT_GUILDS', '').lower() in ('1', 'true', 'yes')
+GUILDS_FILE = 'guild_rosters.json'
+GUILD_ACTIVITY_FILE = 'rubinot_guild_activity.json'
+GUILD_LIST_URL = 'https://rubinot.com.br/?subtopic=guilds&world={world}'
+GUILD_URL = 'https://rubinot.com.br/?subtopic=guilds&page=view&GuildName={name}'
+
+ROSTER_TTL = float(os.getenv('RUBINOT_GUILD_TTL', str(6 * 3600)))
+GUILD_LIST_TTL = float(os.getenv('RUBINOT_GUILD_LIST_TTL', str(24 * 3600)))
+GUILD_CONCURRENCY = int(os.getenv('RUBINOT_GUILD_CONCURRENCY', '3'))
+# Rosters never fetched yet, picked up a few per cycle until every guild is known
+BOOTSTRAP_PER_CYCLE = int(os.getenv('RUBINOT_GUILD_BOOTSTRAP', '5'))
+
+
+class GuildRoster:
+    """Guild memberships with member -> guild and guild -> members indexes
+
+    Each roster remembers when it was fetched. A roster is only refreshed
+    once its TTL has passed and one of its members showed up in the
+    current cycle, plus a few never-fetched guilds per cycle until the
+    world's guild list is covered.
+    """
+
+    def __init__(self, world='Mystian', path=GUILDS_FILE):
+        self.world = world
+        self.path = path
+        self.guild_members = {}
+        self.member_guild = {}
+        self.refreshed = {}
+        self.known_guilds = []
+        self.list_refreshed = 0.0
+        self.dirty = False
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                self.known_guilds = saved.get('guilds', [])
+                self.list_refreshed = saved.get('list_refreshed', 0.0)
+                for name, roster in saved.get('rosters', {}).items():
+                    self.set_members(name, roster['members'], roster['refreshed'])
+                self.dirty = False
+                print(f"Loaded {len(self.guild_members)} guild rosters ({len(self.member_guild)} members)")
+        except Exception as e:
+            print(f"Error loading guild rosters: {e}")
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'guilds': self.known_guilds,
+                    'list_refreshed': self.list_refreshed,
+                    'rosters': {name: {'members': sorted(members), 'refreshed': self.refreshed[name]}
+                                for name, members in sorted(self.guild_members.items())}
+                }, f, indent=2, ensure_ascii=False)
+            self.dirty = False
+        except Exception as e:
+            print(f"Error saving guild rosters: {e}")
+
+    def set_members(self, guild, members, refreshed):
+        """Replace a guild's roster, keeping both indexes in step"""
+        for member in self.guild_members.get(guild, ()):
+            if self.member_guild.get(member) == guild:
+                del self.member_guild[member]
+        self.guild_members[guild] = set(members)
+        for member in members:
+            self.member_guild[member] = guild
+        self.refreshed[guild] = refreshed
+        self.dirty = True
+
+    def set_guild_list(self, guilds, refreshed):
+        self.known_guilds = list(guilds)
+        self.list_refreshed = refreshed
+        # Disbanded guilds drop out of both indexes
+        for guild in [guild for guild in self.guild_members if guild not in self.known_guilds]:
+            self.set_members(guild, (), refreshed)
+            del self.guild_members[guild]
+            del self.refreshed[guild]
+        self.dirty = True
+
+    def guild_of(self, player):
+        return self.member_guild.get(player)
+
+    def list_due(self, now):
+        return now - self.list_refreshed >= GUILD_LIST_TTL
+
+    def due_guilds(self, active_players, now):
+        """Guilds to refresh this cycle: stale rosters with an active member, then a few never fetched"""
+        due = []
+        for player in active_players:
+            guild = self.member_guild.get(player)
+            if guild and guild not in due and now - self.refreshed.get(guild, 0) >= ROSTER_TTL:
+                due.append(guild)
+        unfetched = [guild for guild in self.known_guilds if guild not in self.refreshed]
+        return due + unfetched[:BOOTSTRAP_PER_CYCLE]
+
+    def activity(self, players, deaths, level_ups):
+        """Per-guild members online, deaths and level ups for one scrape, from the indexes alone"""
+        guilds = {}
+
+        def entry(guild):
+            if guild not in guilds:
+                guilds[guild] = {'members': len(self.guild_members.get(guild, ())), 'online': 0,
+                                 'online_levels': 0, 'deaths': 0, 'level_ups': 0, 'levels_gained': 0}
+            return guilds[guild]
+
+        for player in players:
+            guild = self.member_guild.get(player.name)
+            if guild:
+                stats = entry(guild)
+                stats['online'] += 1
+                stats['online_levels'] += player.level
+        for death in deaths:
+            guild = self.member_guild.get(death.player)
+            if guild:
+                entry(guild)['deaths'] += 1
+        for level_up in level_ups:
+            guild = self.member_guild.get(level_up.player)
+            if guild:
+                stats = entry(guild)
+                stats['level_ups'] += 1
+                stats['levels_gained'] += level_up.level_gain
+
+        for stats in guilds.values():
+            online_levels = stats.pop('online_levels')
+            stats['average_online_level'] = round(online_levels / stats['online']) if stats['online'] else 0
+        return dict(sorted(guilds.items(), key=lambda item: (-item[1]['online'], item[0])))
+
+
+class GuildRefresher:
+    """Fetches the guild list and due rosters with bounded concurrency"""
+
+    def __init__(self, fetch, parse_pool, roster, concurrency=GUILD_CONCURRENCY):
+        self.fetch = fetch
+        self.parse_pool = parse_pool
+        self.roster = roster
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def refresh_list(self, now):
+        content = await self.fetch(GUILD_LIST_URL.format(world=urllib.parse.quote(self.roster.world)))
+        guilds = await self.parse_pool.parse(parse_guild_list_page, content)
+        if guilds:
+            self.roster.set_guild_list(guilds, now)
+            print(f"Guild list refreshed: {len(guilds)} guilds")
+
+    async def refresh_guild(self, guild):
+        async with self.semaphore:
+            content = await self.fetch(GUILD_URL.format(name=urllib.parse.quote_plus(guild)))
+        members = await self.parse_pool.parse(parse_guild_members_page, content)
+        # Each roster is applied as soon as it arrives so a timeout keeps the finished ones
+        self.roster.set_members(guild, members, time.time())
+        return len(members)
+
+    async def refresh(self, active_players):
+        now = time.time()
+        if self.roster.list_due(now):
+            await self.refresh_list(now)
+
+        due = self.roster.due_guilds(active_players, now)
+        if not due:
+            return 0
+        results = await asyncio.gather(*(self.refresh_guild(guild) for guild in due), return_exceptions=True)
+        failures = [result for result in results if isinstance(result, Exception)]
+        for failure in failures[:3]:
+            print(f"Error refreshing guild roster: {failure}")
+        print(f"Refreshed {len(due) - len(failures)} of {len(due)} guild rosters")
+        if failures and len(failures) == len(results):
+            raise failures[0]
+        return len(due) - len(failures)
+
+
+def save_guild_activity(activity, path=GUILD_ACTIVITY_FILE):
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(activity, f, indent=2, ensure_ascii=False)
+    except Exception as e:
+        print(f"Error saving guild activity: {e}")
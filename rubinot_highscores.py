@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+
+from rubinot_parsing import parse_highscores_page
+from rubinot_records import LevelDownRecord, LevelUpRecord, capture_timestamp
+
+HIGHSCORES_ENABLED = os.getenv('RUBINOT_HIGHSCORES', '').lower() in ('1', 'true', 'yes')
+HIGHSCORES_URL = os.getenv(
+    'RUBINOT_HIGHSCORES_URL',
+    'https://rubinot.com.br/?subtopic=highscores&world={world}&list=experience&page={page}')
+HIGHSCORES_MAX_PAGES = int(os.getenv('RUBINOT_HIGHSCORES_PAGES', '20'))
+HIGHSCORES_CONCURRENCY = int(os.getenv('RUBINOT_HIGHSCORES_CONCURRENCY', '3'))
+# Pages read per run; the next run carries on where this one stopped
+HIGHSCORES_PAGES_PER_RUN = int(os.getenv('RUBINOT_HIGHSCORES_PAGES_PER_RUN', '6'))
+HIGHSCORES_CURSOR_FILE = 'highscores_cursor.json'
+
+
+class HighscoresCrawler:
+    """Pages through a world's level ranking to catch level ups of offline players
+
+    Each run reads `pages_per_run` pages starting from a cursor saved by the
+    previous run, in waves of `concurrency` at a time, and wraps back to
+    page 1 at the end of the ranking. The top pages rarely change between
+    runs while level ups of offline players happen further down, so the
+    whole ranking is covered every few runs instead of always rereading
+    the top.
+    """
+
+    def __init__(self, fetch, parse_pool, world='Mystian', max_pages=HIGHSCORES_MAX_PAGES,
+                 concurrency=HIGHSCORES_CONCURRENCY, pages_per_run=HIGHSCORES_PAGES_PER_RUN,
+                 path=HIGHSCORES_CURSOR_FILE):
+        self.fetch = fetch
+        self.parse_pool = parse_pool
+        self.world = world
+        self.max_pages = max_pages
+        self.concurrency = max(1, concurrency)
+        self.pages_per_run = max(1, min(pages_per_run, max_pages))
+        self.path = path
+        self.changed = 0
+
+    def load_cursor(self):
+        """Next page to read for this world"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    page = json.load(f).get(self.world, 1)
+                return page if 1 <= page <= self.max_pages else 1
+        except Exception as e:
+            print(f"Error loading highscores cursor: {e}")
+        return 1
+
+    def save_cursor(self, page):
+        try:
+            cursors = {}
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    cursors = json.load(f)
+            cursors[self.world] = page
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(cursors, f, indent=2, sort_keys=True)
+        except Exception as e:
+            print(f"Error saving highscores cursor: {e}")
+
+    def page_url(self, page):
+        return HIGHSCORES_URL.format(world=self.world, page=page)
+
+    def reconcile(self, players, previous_levels, level_ups, level_downs=None):
+        """Update previous levels from ranking rows; returns how many rows changed"""
+        changed = 0
+        for player in players:
+            previous_level = previous_levels.get(player.name)
+            if previous_level == player.level:
+                continue
+            changed += 1
+            if previous_level is not None and player.level > previous_level:
+                level_up = LevelUpRecord(player.name, previous_level, player.level,
+                                         player.vocation, player.timestamp)
+                level_ups.append(level_up)
+                print(f"Offline level up detected: {player.name} {previous_level} -> {player.level} (+{level_up.level_gain})")
+            elif previous_level is not None and level_downs is not None:
+                level_downs.append(LevelDownRecord(player.name, previous_level, player.level,
+                                                   player.vocation, player.timestamp))
+            previous_levels[player.name] = player.level
+        return changed
+
+    async def crawl(self, previous_levels, level_ups, level_downs=None):
+        """Crawl the ranking, appending level ups (and losses) as pages are reconciled
+
+        The lists are filled in place so that a crawl cut short by the run
+        deadline keeps whatever it already found; the cursor is saved after
+        every wave. self.changed counts the ranking rows that updated
+        previous_levels.
+        """
+        captured_at = capture_timestamp()
+        first = page = self.load_cursor()
+        pages_left = self.pages_per_run
+        while pages_left > 0:
+            wave = range(page, min(page + self.concurrency, self.max_pages + 1, page + pages_left))
+            contents = await asyncio.gather(*(self.fetch(self.page_url(number)) for number in wave))
+            results = await self.parse_pool.parse_many(parse_highscores_page, contents, captured_at)
+
+            for number, players in zip(wave, results):
+                pages_left -= 1
+                if not players:
+                    # Past the end of the ranking: start over from the top next run
+                    print(f"Highscores: end of ranking at page {number}")
+                    self.save_cursor(1)
+                    return level_ups
+                self.changed += self.reconcile(players, previous_levels, level_ups, level_downs)
+            page = wave[-1] + 1
+            if page > self.max_pages:
+                page = 1
+            self.save_cursor(page)
+
+        print(f"Highscores: read {self.pages_per_run} pages from page {first}, {self.changed} rows changed")
+        return level_ups
@@ -0,0 +1,287 @@
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+HISTORY_DIR = os.getenv('RUBINOT_HISTORY_DIR', 'history')
+SEGMENT_MAX_BYTES = int(os.getenv('RUBINOT_SEGMENT_MAX_BYTES', str(256 * 1024)))
+# Sealed segments kept as raw NDJSON before they are folded into an archive
+KEEP_SEGMENTS = int(os.getenv('RUBINOT_HISTORY_KEEP_SEGMENTS', '2'))
+# Segment archives that accumulate before they are merged into the second tier
+MERGE_ARCHIVES = int(os.getenv('RUBINOT_HISTORY_MERGE_ARCHIVES', '8'))
+# Per-snapshot online counts kept in the rolling players summary; older ones live in the RRD
+ONLINE_RETENTION_MS = int(os.getenv('RUBINOT_HISTORY_ONLINE_DAYS', '30')) * 86400 * 1000
+# Players archives written before summaries carried the world
+LEGACY_WORLD = 'Mystian'
+
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.ndjson'
+ARCHIVE_NAME = re.compile(r'^archive-\d{8}-\d{8}\.json\.gz$')
+PLAYER_COLUMNS = ['world', 'name', 'first_seen', 'last_seen', 'min_level', 'max_level', 'vocation', 'samples']
+
+
+def write_gzip_json(path, data):
+    temp_path = path + '.tmp'
+    # mtime=0 so the file's bytes only depend on its contents
+    with open(temp_path, 'wb') as f, gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as gz:
+        gz.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    os.replace(temp_path, path)
+
+
+def read_gzip_json(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def event_month(row):
+    timestamp = row.get('death_timestamp') or row['timestamp']
+    return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).strftime('%Y-%m')
+
+
+def player_rows(summary):
+    """Summary rows as PLAYER_COLUMNS lists, converting name-keyed archives from before the world column"""
+    if isinstance(summary['players'], dict):
+        return [[LEGACY_WORLD, name] + values for name, values in summary['players'].items()]
+    return summary['players']
+
+
+def online_rows(summary):
+    return [row if len(row) == 3 else [row[0], LEGACY_WORLD, row[1]] for row in summary['online']]
+
+
+def merge_player_rows(rows):
+    """Fold summary rows of the same (world, name) into one"""
+    players = {}
+    for world, name, first_seen, last_seen, min_level, max_level, vocation, samples in rows:
+        seen = players.get((world, name))
+        if seen is None:
+            players[(world, name)] = [first_seen, last_seen, min_level, max_level, vocation, samples]
+            continue
+        if last_seen >= seen[1]:
+            seen[4] = vocation
+        seen[0] = min(seen[0], first_seen)
+        seen[1] = max(seen[1], last_seen)
+        seen[2] = min(seen[2], min_level)
+        seen[3] = max(seen[3], max_level)
+        seen[5] += samples
+    return [[world, name] + seen for (world, name), seen in sorted(players.items())]
+
+
+def unique_by_id(rows):
+    """Events deduplicated by id, oldest first"""
+    events = {}
+    for row in rows:
+        events.setdefault(row['id'], row)
+    return sorted(events.values(), key=lambda row: (row.get('death_timestamp') or row['timestamp'], row['id']))
+
+
+def summarize_players(rows):
+    """Per (world, player) first/last seen and level range, plus the online count of every snapshot
+
+    Names are only unique within a world, so both the summary rows and the
+    online counts carry the world.
+    """
+    players = {}
+    online = []
+    for snapshot in rows:
+        world = snapshot['world']
+        online.append([snapshot['t'], world, len(snapshot['players'])])
+        for name, level, vocation in snapshot['players']:
+            seen = players.get((world, name))
+            if seen is None:
+                players[(world, name)] = [snapshot['t'], snapshot['t'], level, level, vocation, 1]
+                continue
+            seen[0] = min(seen[0], snapshot['t'])
+            seen[1] = max(seen[1], snapshot['t'])
+            seen[2] = min(seen[2], level)
+            seen[3] = max(seen[3], level)
+            seen[4] = vocation
+            seen[5] += 1
+    return {
+        'columns': PLAYER_COLUMNS,
+        'players': [[world, name] + seen for (world, name), seen in sorted(players.items())],
+        'online': sorted(online)
+    }
+
+
+SUMMARIZERS = {
+    'deaths': unique_by_id,
+    'levelups': unique_by_id,
+    'players': summarize_players,
+}
+
+
+class SegmentedLog:
+    """Append-only event log split into size-limited NDJSON segments
+
+    Only the newest segment is appended to; once it passes max_bytes a new
+    one is started. Sealed segments beyond the newest keep_segments are
+    compacted into an immutable, summarized archive-<first>-<last>.json.gz
+    and deleted, so a commit only ever touches the active segment and, now
+    and then, adds one archive.
+
+    Once merge_archives archives pile up they are folded into a second
+    tier: deaths and level ups into one month-<YYYY-MM>.json.gz per month,
+    players into one rolling-<world>.json.gz summary per world, keyed by
+    (world, name). The number of files then grows by one a month at most,
+    and the players summary with the number of distinct players.
+    """
+
+    def __init__(self, stream, directory=HISTORY_DIR, max_bytes=SEGMENT_MAX_BYTES, keep_segments=KEEP_SEGMENTS,
+                 merge_archives=MERGE_ARCHIVES):
+        self.stream = stream
+        self.directory = os.path.join(directory, stream)
+        self.max_bytes = max_bytes
+        self.keep_segments = keep_segments
+        self.merge_archives = max(1, merge_archives)
+        self.summarize = SUMMARIZERS[stream]
+
+    def segment_path(self, sequence):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{sequence:08d}{SEGMENT_SUFFIX}")
+
+    def segments(self):
+        """Sequence numbers of the segments on disk, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+                      if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+
+    def active_path(self):
+        segments = self.segments()
+        if not segments:
+            return self.segment_path(1)
+        path = self.segment_path(segments[-1])
+        if os.path.getsize(path) >= self.max_bytes:
+            return self.segment_path(segments[-1] + 1)
+        return path
+
+    def append(self, rows):
+        if not rows:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.active_path(), 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')))
+                f.write('\n')
+        return len(rows)
+
+    def read_segments(self, sequences):
+        rows = []
+        for sequence in sequences:
+            with open(self.segment_path(sequence), 'r', encoding='utf-8') as f:
+                rows.extend(json.loads(line) for line in f if line.strip())
+        return rows
+
+    def compact(self):
+        """Fold the oldest sealed segments into one archive; returns how many segments were compacted"""
+        sealed = self.segments()[:-1]
+        batch = sealed[:len(sealed) - self.keep_segments]
+        if not batch:
+            return 0
+
+        archive = {
+            'stream': self.stream,
+            'segments': [batch[0], batch[-1]],
+            'summary': self.summarize(self.read_segments(batch))
+        }
+        path = os.path.join(self.directory, f"archive-{batch[0]:08d}-{batch[-1]:08d}.json.gz")
+        write_gzip_json(path, archive)
+
+        for sequence in batch:
+            os.remove(self.segment_path(sequence))
+        print(f"Compacted {len(batch)} {self.stream} segments into {os.path.basename(path)}")
+        return len(batch)
+
+    def archives(self):
+        """Paths of the segment archives, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, name) for name in sorted(os.listdir(self.directory))
+                if ARCHIVE_NAME.match(name)]
+
+    def merge(self):
+        """Fold the segment archives into the second tier once enough have piled up; returns how many"""
+        paths = self.archives()
+        if len(paths) < self.merge_archives:
+            return 0
+        summaries = [read_gzip_json(path)['summary'] for path in paths]
+        if self.stream == 'players':
+            targets = self.merge_players(summaries)
+        else:
+            targets = self.merge_events(summaries)
+        for path in paths:
+            os.remove(path)
+        print(f"Merged {len(paths)} {self.stream} archives into {', '.join(sorted(targets))}")
+        return len(paths)
+
+    def merge_events(self, summaries):
+        months = {}
+        for summary in summaries:
+            for row in summary:
+                months.setdefault(event_month(row), []).append(row)
+        targets = []
+        for month, rows in months.items():
+            path = os.path.join(self.directory, f"month-{month}.json.gz")
+            if os.path.exists(path):
+                rows = read_gzip_json(path)['summary'] + rows
+            write_gzip_json(path, {'stream': self.stream, 'month': month, 'summary': unique_by_id(rows)})
+            targets.append(os.path.basename(path))
+        return targets
+
+    def merge_players(self, summaries):
+        worlds = {}
+        for summary in summaries:
+            for row in player_rows(summary):
+                worlds.setdefault(row[0], ([], []))[0].append(row)
+            for row in online_rows(summary):
+                worlds.setdefault(row[1], ([], []))[1].append(row)
+        targets = []
+        for world, (rows, online) in worlds.items():
+            path = os.path.join(self.directory, f"rolling-{world}.json.gz")
+            if os.path.exists(path):
+                rolling = read_gzip_json(path)['summary']
+                rows = rolling['players'] + rows
+                online = rolling['online'] + online
+            online = sorted(online)
+            if online:
+                cutoff = online[-1][0] - ONLINE_RETENTION_MS
+                online = [row for row in online if row[0] >= cutoff]
+            write_gzip_json(path, {'stream': self.stream, 'world': world, 'summary': {
+                'columns': PLAYER_COLUMNS,
+                'players': merge_player_rows(rows),
+                'online': online
+            }})
+            targets.append(os.path.basename(path))
+        return targets
+
+
+class History:
+    """Segmented logs for the deaths, level-up and online player streams"""
+
+    def __init__(self, directory=HISTORY_DIR):
+        self.logs = {stream: SegmentedLog(stream, directory) for stream in SUMMARIZERS}
+
+    def append_scrape(self, data, new_deaths, world):
+        """Append one scrape: only deaths not seen before, its level ups and a compact players snapshot"""
+        counts = {
+            'deaths': self.logs['deaths'].append([dict(death.to_dict(), world=world) for death in new_deaths]),
+            'levelups': self.logs['levelups'].append([dict(level_up.to_dict(), world=world)
+                                                     for level_up in data['level_ups']]),
+        }
+        players = data['online_players']
+        if players and 'online_players' not in data.get('incomplete', ()) and 'players' not in data.get('stale', ()):
+            counts['players'] = self.logs['players'].append([{
+                't': players[0].timestamp,
+                'world': world,
+                'players': [[player.name, player.level, player.vocation] for player in players]
+            }])
+        return counts
+
+    def compact(self):
+        for log in self.logs.values():
+            try:
+                log.compact()
+                log.merge()
+            except Exception as e:
+                print(f"Error compacting {log.stream} history: {e}")
@@ -0,0 +1,238 @@
+import asyncio
+import heapq
+import json
+import os
+import random
+import time
+import urllib.parse
+
+from rubinot_cache import body_hash
+from rubinot_state import STATE_DIR
+from rubinot_timeline import DeathTimeline
+
+JOB_RUNNER = os.getenv('RUBINOT_JOB_RUNNER', '').lower() in ('1', 'true', 'yes')
+WORLDS = [world.strip() for world in os.getenv('RUBINOT_WORLDS', 'Mystian').split(',') if world.strip()]
+JOB_STATE_FILE = 'job_state.json'
+
+DEATHS_URL = 'https://rubinot.com.br/?subtopic=latestdeaths'
+PLAYERS_URL = 'https://rubinot.com.br/?subtopic=worlds&world={world}'
+
+# (min, initial, max) seconds between polls and priority (lower runs first) per page type
+PAGE_INTERVALS = {
+    'deaths': (60.0, 180.0, 900.0),
+    'players': (120.0, 300.0, 1800.0),
+}
+PAGE_PRIORITY = {'deaths': 0, 'players': 1}
+# A page that changed is polled sooner next time, an unchanged one later
+BUSY_FACTOR = 0.5
+QUIET_FACTOR = 1.5
+JITTER = 0.1
+
+HOST_CONCURRENCY = int(os.getenv('RUBINOT_HOST_CONCURRENCY', '2'))
+RATE_LIMIT = float(os.getenv('RUBINOT_RATE_LIMIT', '0.5'))
+RATE_BURST = int(os.getenv('RUBINOT_RATE_BURST', '2'))
+
+
+class RateLimiter:
+    """Token bucket shared by every job: `rate` requests per second with bursts of `burst`"""
+
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostLimits:
+    """One semaphore per host, created on first use"""
+
+    def __init__(self, limit=HOST_CONCURRENCY):
+        self.limit = max(1, limit)
+        self.semaphores = {}
+
+    def get(self, host):
+        semaphore = self.semaphores.get(host)
+        if semaphore is None:
+            semaphore = self.semaphores[host] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+
+class Job:
+    """One (world, page type) pair, polled on its own adaptive interval"""
+
+    def __init__(self, world, page, url, data=None, priority=None, intervals=None):
+        self.world = world
+        self.page = page
+        self.url = url
+        self.data = data
+        self.priority = PAGE_PRIORITY.get(page, 9) if priority is None else priority
+        self.min_interval, self.interval, self.max_interval = intervals or PAGE_INTERVALS[page]
+        self.host = urllib.parse.urlsplit(url).hostname
+        self.next_run = 0.0
+        self.digest = None
+
+    @property
+    def key(self):
+        return f"{self.page}:{self.world}"
+
+    def reschedule(self, now, changed):
+        """Poll busy pages more often and quiet ones less, within the page type's bounds"""
+        factor = BUSY_FACTOR if changed else QUIET_FACTOR
+        self.interval = min(self.max_interval, max(self.min_interval, self.interval * factor))
+        self.next_run = now + self.interval * random.uniform(1 - JITTER, 1 + JITTER)
+
+    def back_off(self, now):
+        self.interval = self.max_interval
+        self.next_run = now + self.interval
+
+    def to_dict(self):
+        return {'interval': self.interval, 'next_run': self.next_run, 'digest': self.digest}
+
+    def restore(self, saved):
+        self.interval = min(self.max_interval, max(self.min_interval, saved.get('interval', self.interval)))
+        self.next_run = saved.get('next_run', 0.0)
+        self.digest = saved.get('digest')
+
+
+def world_jobs(worlds=WORLDS):
+    """The deaths and online players jobs of every world"""
+    jobs = []
+    for world in worlds:
+        jobs.append(Job(world, 'deaths', DEATHS_URL, data={'world': world}))
+        jobs.append(Job(world, 'players', PLAYERS_URL.format(world=urllib.parse.quote(world))))
+    return jobs
+
+
+class WorldState:
+    """Per-world level shards and death timeline for the job runner"""
+
+    def __init__(self, world, levels):
+        self.world = world
+        self.levels = levels
+        self.timeline = DeathTimeline(os.path.join(STATE_DIR, world, 'death_timeline.json'))
+        self.timeline.load()
+
+    def save(self):
+        self.levels.save()
+        os.makedirs(os.path.dirname(self.timeline.path), exist_ok=True)
+        self.timeline.save()
+
+
+class JobRunner:
+    """Runs many jobs from one event loop, earliest due first
+
+    Jobs sit in a heap ordered by (next run, priority). Due jobs are started
+    as tasks; each waits for its host's semaphore and a token from the
+    shared rate limiter before `fetch(job)`. Pages whose body hash did not
+    change skip `handle(job, content)` and are polled less often.
+    """
+
+    def __init__(self, jobs, fetch, handle, rate_limiter=None, host_limits=None, path=JOB_STATE_FILE):
+        self.jobs = jobs
+        self.fetch = fetch
+        self.handle = handle
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.host_limits = host_limits or HostLimits()
+        self.path = path
+        self.queue = []
+        self.sequence = 0
+        self.runs = 0
+        self.changes = 0
+        self.once = False
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                for job in self.jobs:
+                    if job.key in saved:
+                        job.restore(saved[job.key])
+        except Exception as e:
+            print(f"Error loading job state: {e}")
+
+    def save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({job.key: job.to_dict() for job in self.jobs}, f, indent=2, sort_keys=True)
+        except Exception as e:
+            print(f"Error saving job state: {e}")
+
+    def push(self, job):
+        self.sequence += 1
+        heapq.heappush(self.queue, (job.next_run, job.priority, self.sequence, job))
+
+    async def run_job(self, job):
+        try:
+            async with self.host_limits.get(job.host):
+                await self.rate_limiter.acquire()
+                content = await self.fetch(job)
+            self.runs += 1
+            digest = body_hash(content)
+            changed = digest != job.digest
+            if changed:
+                await self.handle(job, content)
+                job.digest = digest
+                self.changes += 1
+            job.reschedule(time.time(), changed)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error running {job.key} job: {e}")
+            job.back_off(time.time())
+        if not self.once:
+            self.push(job)
+
+    async def run(self, deadline, once=False):
+        """Run due jobs until nothing more is due before the deadline, then wait for those in flight
+
+        With `once` (one-shot runs started by a scheduler), only the jobs
+        due now run, each a single time; the rest keep their saved next run
+        for a later invocation instead of holding this one open.
+        """
+        self.once = once
+        now = time.time()
+        waiting = 0
+        for job in self.jobs:
+            if once and job.next_run > now:
+                waiting += 1
+                continue
+            self.push(job)
+        running = set()
+        try:
+            while (self.queue or running) and not deadline.expired:
+                running = {task for task in running if not task.done()}
+                wait = self.queue[0][0] - time.time() if self.queue else deadline.remaining()
+                if wait > 0:
+                    if running:
+                        # Wake up early when a running job finishes, since it may be due sooner
+                        await asyncio.wait(running, timeout=min(wait, deadline.remaining()),
+                                           return_when=asyncio.FIRST_COMPLETED)
+                    elif wait > deadline.remaining():
+                        break
+                    else:
+                        await asyncio.sleep(wait)
+                    continue
+                job = heapq.heappop(self.queue)[3]
+                running.add(asyncio.create_task(self.run_job(job)))
+            if running:
+                await asyncio.wait(running, timeout=max(deadline.remaining(), 0.001))
+        finally:
+            for task in running:
+                task.cancel()
+        print(f"Job runner: {self.runs} fetches, {self.changes} changed pages across {len(self.jobs)} jobs")
+        if waiting:
+            print(f"Job runner: {waiting} jobs not due yet, left for the next run")
+        return self.runs
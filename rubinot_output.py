@@ -0,0 +1,98 @@
+import gzip
+import json
+import os
+
+OUTPUT_FORMAT = os.getenv('RUBINOT_OUTPUT_FORMAT', 'json').lower()
+OUTPUT_COMPRESSION = os.getenv('RUBINOT_OUTPUT_COMPRESSION', 'none').lower()
+OUTPUT_MAX_BYTES = int(os.getenv('RUBINOT_OUTPUT_MAX_BYTES', str(20 * 1024 * 1024)))
+OUTPUT_BACKUPS = int(os.getenv('RUBINOT_OUTPUT_BACKUPS', '5'))
+
+EXTENSIONS = {
+    'none': '.ndjson',
+    'gzip': '.ndjson.gz',
+    'zstd': '.ndjson.zst',
+}
+
+
+class NDJSONWriter:
+    """Append records as NDJSON lines with optional compression and size-bounded rotation"""
+
+    def __init__(self, base_path, compression=OUTPUT_COMPRESSION,
+                 max_bytes=OUTPUT_MAX_BYTES, backups=OUTPUT_BACKUPS):
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Unknown output compression: {compression}")
+        self.base_path = base_path
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    @property
+    def path(self):
+        return self.base_path + EXTENSIONS[self.compression]
+
+    def rotated_path(self, index):
+        return f"{self.base_path}.{index}{EXTENSIONS[self.compression]}"
+
+    def rotate_if_needed(self):
+        """Shift full files to numbered backups, dropping the oldest"""
+        if not self.max_bytes or not os.path.exists(self.path):
+            return
+        if os.path.getsize(self.path) < self.max_bytes:
+            return
+
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(self.rotated_path(index)):
+                os.replace(self.rotated_path(index), self.rotated_path(index + 1))
+        if self.backups > 0:
+            os.replace(self.path, self.rotated_path(1))
+        else:
+            os.remove(self.path)
+
+    def open_stream(self):
+        # Appending a new gzip member or zstd frame per run keeps the file stream-decodable
+        if self.compression == 'gzip':
+            return gzip.open(self.path, 'at', encoding='utf-8')
+        if self.compression == 'zstd':
+            import io
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError("zstd output needs the 'zstandard' package (pip install zstandard)")
+            raw = open(self.path, 'ab')
+            compressed = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+            return io.TextIOWrapper(compressed, encoding='utf-8')
+        return open(self.path, 'a', encoding='utf-8')
+
+    def write_rows(self, rows):
+        """Stream dicts to the output file one line at a time"""
+        self.rotate_if_needed()
+        count = 0
+        with self.open_stream() as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')))
+                f.write('\n')
+                count += 1
+        return count
+
+    def write_records(self, records, extra=None):
+        """Stream records to the output file one line at a time"""
+        return self.write_rows(dict(record.to_dict(), **(extra or {})) for record in records)
+
+
+def save_ndjson(data, world, prefix='rubinot'):
+    """Write each record stream of a scrape as NDJSON
+
+    The deaths page repeats the latest deaths every run, so only the deaths
+    the timeline had not seen before (data['new_deaths']) are appended.
+    """
+    extra = {'world': world}
+    streams = {
+        'deaths': data.get('new_deaths', data['deaths']),
+        'online_players': data['online_players'],
+        'level_ups': data['level_ups'],
+    }
+    counts = {}
+    for key, name in (('deaths', 'deaths'), ('online_players', 'players'), ('level_ups', 'levelups')):
+        writer = NDJSONWriter(f"{prefix}_{name}")
+        counts[key] = writer.write_records(streams[key], extra)
+    return counts
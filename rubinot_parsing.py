@@ -0,0 +1,260 @@
+import asyncio
+import os
+import re
+import urllib.parse
+
+from rubinot_profiling import profile_stage
+from rubinot_records import PlayerRecord, DeathRecord, capture_timestamp
+from rubinot_timeline import parse_death_time, sort_deaths
+
+PARSE_WORKERS = int(os.getenv('RUBINOT_PARSE_WORKERS', '0'))
+
+DEATH_PATTERN = re.compile(r'(.+?)\s+died\s+at\s+level\s+(\d+)\s+by\s+(.+?)\.?\s*$', re.IGNORECASE)
+LAST_KILLER_SEPARATOR = re.compile(r'\s+and\s+(?!.*\s+and\s+)', re.IGNORECASE)
+CREATURE_ARTICLES = ('a ', 'an ', 'the ')
+
+
+def make_soup(content):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(content, 'html.parser')
+
+
+def parse_killers(killer_text, linked_names=None):
+    """Split "X, Y and Z" into (name, is_player) pairs
+
+    Character names are links on the deaths page, so when the cell has links
+    anything unlinked is a creature. Without links, creatures are recognised
+    by their article ("a dragon lord") or a lowercase first letter.
+    """
+    parts = LAST_KILLER_SEPARATOR.split(killer_text, maxsplit=1)
+    names = [name.strip() for name in parts[0].split(',')] + [name.strip() for name in parts[1:]]
+
+    killers = []
+    for name in names:
+        if not name:
+            continue
+        if linked_names is not None:
+            is_player = name in linked_names
+        else:
+            is_player = not (name.lower().startswith(CREATURE_ARTICLES) or name[0].islower())
+        killers.append((name, is_player))
+    return killers
+
+
+def parse_deaths_soup(soup, captured_at):
+    """Parse deaths from HTML content"""
+    deaths = []
+    seen = set()
+
+    tables = soup.find_all('table')
+    for table in tables:
+        rows = table.find_all('tr')
+
+        deaths_in_this_table = 0
+        for row in rows:
+            cells = row.find_all(['td', 'th'])
+
+            if len(cells) >= 3:
+                # Look for death information in different cell positions
+                for i in range(len(cells)):
+                    cell_text = cells[i].get_text().strip()
+
+                    match = DEATH_PATTERN.search(cell_text)
+                    if match:
+                        player = match.group(1).strip()
+                        level = int(match.group(2))
+                        killer = match.group(3).strip()
+
+                        if killer.endswith('.'):
+                            killer = killer[:-1]
+
+                        # Try to get time from another cell
+                        time_text = "Unknown"
+                        if i > 0:
+                            time_text = cells[i-1].get_text().strip()
+                        elif i < len(cells) - 1:
+                            time_text = cells[i+1].get_text().strip()
+
+                        # Check for duplicates
+                        key = (player, level, killer)
+                        if key not in seen:
+                            seen.add(key)
+                            links = cells[i].find_all('a')
+                            linked_names = {link.get_text().strip() for link in links} if links else None
+                            # Prefer the page's own death time so the id is stable across runs
+                            death_timestamp = parse_death_time(time_text)
+                            id_seconds = (death_timestamp or captured_at) // 1000
+                            deaths.append(DeathRecord(player, level, killer, time_text, captured_at,
+                                                      f"{player}-{level}-{killer}-{id_seconds}",
+                                                      parse_killers(killer, linked_names), death_timestamp))
+                            deaths_in_this_table += 1
+                            print(f"Parsed death: {player} (lvl {level}) killed by {killer}")
+
+                        break
+
+        if deaths_in_this_table > 0:
+            break
+
+    return sort_deaths(deaths[:20])  # Return max 20 recent deaths
+
+
+def parse_players_soup(soup, captured_at):
+    """Parse online players from HTML content, or None if there is no players table"""
+    players = []
+
+    # Find the players table - look for table with player data
+    tables = soup.find_all('table')
+    players_table = None
+
+    for table in tables:
+        rows = table.find_all('tr')
+        if len(rows) > 1:
+            # Check if this looks like a players table
+            cells = rows[1].find_all(['td', 'th'])
+
+            if len(cells) >= 3:
+                # Check if the second cell contains a number (level)
+                try:
+                    int(cells[1].get_text().strip())
+                    players_table = table
+                    break
+                except ValueError:
+                    continue
+
+    if not players_table:
+        return None
+
+    # Parse players from the table
+    rows = players_table.find_all('tr')[1:]  # Skip header
+    for row in rows:
+        cells = row.find_all(['td', 'th'])
+        if len(cells) >= 3:
+            player_name = cells[0].get_text().strip()
+            level_text = cells[1].get_text().strip()
+            vocation = cells[2].get_text().strip()
+
+            try:
+                current_level = int(level_text)
+            except ValueError:
+                continue
+
+            if player_name and current_level > 0:
+                players.append(PlayerRecord(player_name, current_level, vocation, captured_at))
+
+    return players
+
+
+def parse_highscores_soup(soup, captured_at):
+    """Parse a highscores (level ranking) page into player records
+
+    Rows look like rank, name, vocation, level, experience; the level is the
+    first plain number after the name, experience carries thousands separators.
+    """
+    players = []
+    for row in soup.find_all('tr'):
+        cells = [cell.get_text().strip() for cell in row.find_all(['td', 'th'])]
+        if len(cells) < 4 or not cells[0].rstrip('.').isdigit():
+            continue
+
+        name = cells[1]
+        vocation = 'Unknown'
+        level = None
+        for text in cells[2:]:
+            if text.isdigit():
+                level = int(text)
+                break
+            if vocation == 'Unknown' and text and not any(ch.isdigit() for ch in text):
+                vocation = text
+
+        if name and level:
+            players.append(PlayerRecord(name, level, vocation, captured_at))
+    return players
+
+
+def link_param(link, param):
+    """A query parameter of a link's href, or None"""
+    query = urllib.parse.urlsplit(link.get('href', '')).query
+    values = urllib.parse.parse_qs(query).get(param)
+    return values[0] if values else None
+
+
+def parse_guild_list_soup(soup):
+    """Guild names linked from a world's guild list"""
+    names = []
+    for link in soup.find_all('a', href=True):
+        name = link_param(link, 'GuildName')
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def parse_guild_members_soup(soup):
+    """Character names linked from a guild page's member list"""
+    members = []
+    for link in soup.find_all('a', href=True):
+        if link_param(link, 'subtopic') != 'characters':
+            continue
+        name = link_param(link, 'name') or link.get_text().strip()
+        if name and name not in members:
+            members.append(name)
+    return members
+
+
+def parse_deaths_page(content, captured_at=None):
+    """Raw deaths page bytes in, death records out; safe to run in a worker process"""
+    return parse_deaths_soup(make_soup(content), captured_at or capture_timestamp())
+
+
+def parse_players_page(content, captured_at=None):
+    """Raw worlds page bytes in, player records out; safe to run in a worker process"""
+    return parse_players_soup(make_soup(content), captured_at or capture_timestamp())
+
+
+def parse_guild_list_page(content):
+    """Raw guild list page bytes in, guild names out"""
+    return parse_guild_list_soup(make_soup(content))
+
+
+def parse_guild_members_page(content):
+    """Raw guild page bytes in, member names out"""
+    return parse_guild_members_soup(make_soup(content))
+
+
+def parse_highscores_page(content, captured_at=None):
+    """Raw highscores page bytes in, player records out; safe to run in a worker process"""
+    return parse_highscores_soup(make_soup(content), captured_at or capture_timestamp())
+
+
+class ParsePool:
+    """Optional process pool that keeps BeautifulSoup parsing off the event loop"""
+
+    def __init__(self, workers=PARSE_WORKERS):
+        self.workers = workers
+        self.executor = None
+
+    def start(self):
+        """Start the worker processes once; later calls are no-ops"""
+        if self.workers <= 0 or self.executor is not None:
+            return
+        from concurrent.futures import ProcessPoolExecutor
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        # Launch the workers now, before fetch threads exist, instead of on the first parse
+        self.executor.submit(os.getpid).result()
+        print(f"Started parse pool with {self.workers} workers")
+
+    async def parse(self, func, *args):
+        """Run a page parser in the pool, or inline when the pool is disabled"""
+        with profile_stage('parse'):
+            if self.executor is None:
+                return func(*args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+
+    async def parse_many(self, func, contents, *args):
+        """Parse several pages (worlds, backfilled death pages) in parallel"""
+        return await asyncio.gather(*(self.parse(func, content, *args) for content in contents))
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,47 @@
+import os
+import sys
+import urllib.parse
+import urllib.request
+
+from rubinot_cache import body_hash
+
+# Only stdlib and the cache module are imported here so the pre-check path
+# never pays for requests, urllib3 or bs4
+FAST_START = ('--fast-start' in sys.argv
+              or os.getenv('RUBINOT_FAST_START', '').lower() in ('1', 'true', 'yes'))
+
+PRECHECK_PAGES = [
+    # Players change most often, so check them first and bail out early
+    ('players', 'https://rubinot.com.br/?subtopic=worlds&world=Mystian', None),
+    ('deaths', 'https://rubinot.com.br/?subtopic=latestdeaths', {'world': 'Mystian'}),
+]
+
+PRECHECK_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+def fetch_body(url, form=None, timeout=15):
+    """Fetch a page body with urllib, posting form data when given"""
+    data = urllib.parse.urlencode(form).encode() if form else None
+    request = urllib.request.Request(url, data=data, headers=PRECHECK_HEADERS)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def pages_unchanged(parse_cache):
+    """Return True when every pre-checked page still hashes to its cached parse"""
+    for page, url, form in PRECHECK_PAGES:
+        if page not in parse_cache.entries:
+            return False
+        try:
+            body = fetch_body(url, form)
+        except Exception as e:
+            print(f"Pre-check fetch failed for {page}: {e}")
+            return False
+        if parse_cache.lookup(page, body_hash(body)) is None:
+            print(f"Pre-check: {page} changed, running full scrape")
+            return False
+    return True
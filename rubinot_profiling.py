@@ -0,0 +1,155 @@
+import contextlib
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# Off unless asked for; when off, profile_run and profile_stage hand back a
+# shared no-op context manager and nothing else runs
+PROFILE = ('--profile' in sys.argv
+           or os.getenv('RUBINOT_PROFILE', '').lower() in ('1', 'true', 'yes'))
+PROFILE_DIR = os.getenv('RUBINOT_PROFILE_DIR', 'profiles')
+SAMPLE_INTERVAL = float(os.getenv('RUBINOT_PROFILE_INTERVAL_MS', '5')) / 1000
+TOP_N = int(os.getenv('RUBINOT_PROFILE_TOP', '25'))
+
+NO_PROFILE = contextlib.nullcontext()
+
+# Leaf frames of pool threads waiting for work
+IDLE_FRAMES = {('wait', 'threading.py'), ('_worker', 'thread.py')}
+
+active_profiler = None
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler producing folded stacks for flamegraph tools
+
+    A daemon thread snapshots every thread's stack each SAMPLE_INTERVAL.
+    Idle pool threads are dropped so the profile shows work, network waits
+    and event loop idling only. Stage timings record the wall time spent in
+    each named stage.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.stage_times = Counter()
+        self.stage_calls = Counter()
+        self.started_at = None
+        self.running = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.started_at = datetime.now()
+        self.running.set()
+        self.thread = threading.Thread(target=self.run, name='profiler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running.clear()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        while self.running.is_set():
+            self.sample()
+            time.sleep(self.interval)
+
+    def sample(self):
+        me = threading.get_ident()
+        main = threading.main_thread().ident
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            if ident != main and (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename)) in IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, 'thread'))
+            self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_times[name] += time.perf_counter() - start
+            self.stage_calls[name] += 1
+
+    def summary(self, top=TOP_N):
+        """Top-N hotspots by self and inclusive samples, plus stage wall times"""
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for label in set(frames):
+                inclusive[label] += count
+
+        total = sum(self.stacks.values()) or 1
+        lines = [f"Profile of run started {self.started_at:%Y-%m-%d %H:%M:%S}: "
+                 f"{self.samples} samples every {self.interval * 1000:.0f}ms", "", "Stages (wall time):"]
+        for name, seconds in self.stage_times.most_common():
+            lines.append(f"  {name:<12} {seconds:8.3f}s  ({self.stage_calls[name]} calls)")
+        for title, counts in (('self', own), ('inclusive', inclusive)):
+            lines += ["", f"Top {top} by {title} samples:"]
+            for label, count in counts.most_common(top):
+                lines.append(f"  {count:6d} {count / total:6.1%}  {label}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, directory=PROFILE_DIR):
+        """Write <stamp>.folded (flamegraph.pl / speedscope input) and <stamp>.txt; returns the base path"""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"profile-{self.started_at:%Y%m%d-%H%M%S}")
+        with open(base + '.folded', 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(self.summary())
+        return base
+
+
+@contextlib.contextmanager
+def profiled_run():
+    global active_profiler
+    active_profiler = SamplingProfiler()
+    active_profiler.start()
+    try:
+        yield active_profiler
+    finally:
+        active_profiler.stop()
+        try:
+            base = active_profiler.write()
+            print(f"Wrote profile to {base}.folded and {base}.txt")
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+        active_profiler = None
+
+
+def profile_run():
+    """Sample one scrape cycle when profiling is on"""
+    if not PROFILE:
+        return NO_PROFILE
+    return profiled_run()
+
+
+def profile_stage(name):
+    """Time a named stage inside a profiled run"""
+    if active_profiler is None:
+        return NO_PROFILE
+    return active_profiler.stage(name)
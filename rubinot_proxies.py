@@ -0,0 +1,161 @@
+import json
+import os
+import random
+import time
+from collections import deque
+
+TOR_PROXY = 'socks5h://127.0.0.1:9050'
+PROXY_HEALTH_FILE = 'proxy_health.json'
+
+# Comma-separated http://, https:// or socks5h:// proxy URLs used alongside Tor
+PROXY_URLS = [url.strip() for url in os.getenv('RUBINOT_PROXIES', '').split(',') if url.strip()]
+
+HEALTH_WINDOW = 20
+MIN_SAMPLES = 5
+EVICT_BELOW_SUCCESS = 0.5
+EVICT_AFTER_FAILURES = 3
+# Keeps a failing proxy pickable until it is evicted and probed again
+MIN_WEIGHT = 0.01
+EVICT_COOLDOWN = float(os.getenv('RUBINOT_PROXY_COOLDOWN', '600'))
+# Per-attempt cap through a proxy: a slow exit should fail over, not wait out the caller's timeout
+PROXY_TIMEOUT = float(os.getenv('RUBINOT_PROXY_TIMEOUT', '15'))
+
+
+class ProxyHealth:
+    """Rolling success and latency record for one proxy"""
+
+    def __init__(self, url, results=(), evicted_until=0.0):
+        self.url = url
+        self.results = deque(results, maxlen=HEALTH_WINDOW)
+        self.evicted_until = evicted_until
+
+    @property
+    def success_rate(self):
+        # Laplace prior: one failure out of one try is not a 0% proxy
+        return (sum(1 for ok, _ in self.results if ok) + 1) / (len(self.results) + 2)
+
+    @property
+    def consecutive_failures(self):
+        failures = 0
+        for ok, _ in reversed(self.results):
+            if ok:
+                break
+            failures += 1
+        return failures
+
+    @property
+    def latency(self):
+        latencies = [latency for ok, latency in self.results if ok]
+        if not latencies:
+            return 1.0
+        return sum(latencies) / len(latencies)
+
+    @property
+    def weight(self):
+        # Reliable and fast proxies get most of the traffic; untried ones start optimistic
+        return max(MIN_WEIGHT, self.success_rate / max(self.latency, 0.05))
+
+    @property
+    def evicted(self):
+        return time.time() < self.evicted_until
+
+    def record(self, ok, latency):
+        probing = self.evicted_until > 0
+        self.results.append((ok, latency))
+        if ok:
+            self.evicted_until = 0.0
+        elif (probing or self.consecutive_failures >= EVICT_AFTER_FAILURES
+              or (len(self.results) >= MIN_SAMPLES and self.success_rate < EVICT_BELOW_SUCCESS)):
+            # A failed probe after the cooldown evicts again straight away
+            self.evicted_until = time.time() + EVICT_COOLDOWN
+            print(f"Evicting proxy {self.url} ({self.success_rate:.0%} success) for {EVICT_COOLDOWN:.0f}s")
+
+    def to_dict(self):
+        return {'results': list(self.results), 'evicted_until': self.evicted_until}
+
+
+class ProxyPool:
+    """Weighted, health-scored selection over a pool of HTTP/SOCKS proxies
+
+    Evicted proxies are skipped until their cooldown passes and are then
+    probed with real traffic again. With no proxy available, requests go
+    out directly. Sessions used through the pool should not retry on their
+    own (see adapter_retries): failing over to the next proxy is the retry.
+    """
+
+    def __init__(self, urls, path=PROXY_HEALTH_FILE):
+        self.path = path
+        self.proxies = {url: ProxyHealth(url) for url in urls}
+
+    @classmethod
+    def from_env(cls, include_tor=True):
+        urls = ([TOR_PROXY] if include_tor else []) + [url for url in PROXY_URLS if url != TOR_PROXY]
+        pool = cls(urls)
+        pool.load()
+        return pool
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                for url, health in self.proxies.items():
+                    if url in saved:
+                        self.proxies[url] = ProxyHealth(url, [tuple(r) for r in saved[url]['results']],
+                                                        saved[url]['evicted_until'])
+        except Exception as e:
+            print(f"Error loading proxy health: {e}")
+
+    def save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({url: health.to_dict() for url, health in self.proxies.items()}, f)
+        except Exception as e:
+            print(f"Error saving proxy health: {e}")
+
+    def includes(self, url):
+        return url in self.proxies
+
+    def adapter_retries(self, retry):
+        """Retry setting for the session's adapter: none while the pool has proxies to fail over to"""
+        return 0 if self.proxies else retry
+
+    def choose(self, exclude=()):
+        candidates = [health for url, health in self.proxies.items()
+                      if not health.evicted and url not in exclude]
+        if not candidates:
+            return None
+        return random.choices(candidates, weights=[health.weight for health in candidates])[0]
+
+    def request(self, session, method, url, **kwargs):
+        """Send a request through the healthiest proxies, failing over to the next pick"""
+        tried = set()
+        last_error = None
+        proxy_kwargs = dict(kwargs, timeout=min(kwargs.get('timeout') or PROXY_TIMEOUT, PROXY_TIMEOUT))
+        while True:
+            health = self.choose(exclude=tried)
+            if health is None:
+                if tried:
+                    raise last_error
+                # Nothing usable in the pool: fall back to a direct connection
+                return session.request(method, url, **kwargs)
+
+            tried.add(health.url)
+            start = time.monotonic()
+            try:
+                response = session.request(method, url, proxies={'http': health.url, 'https': health.url},
+                                           **proxy_kwargs)
+                response.raise_for_status()
+            except Exception as e:
+                health.record(False, time.monotonic() - start)
+                print(f"Request via {health.url} failed: {e}")
+                last_error = e
+                continue
+            health.record(True, time.monotonic() - start)
+            return response
+
+    def get(self, session, url, **kwargs):
+        return self.request(session, 'GET', url, **kwargs)
+
+    def post(self, session, url, **kwargs):
+        return self.request(session, 'POST', url, **kwargs)
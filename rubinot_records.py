@@ -0,0 +1,144 @@
+import sys
+import time
+
+
+def capture_timestamp():
+    """Return the capture time for a scrape in epoch milliseconds"""
+    return int(time.time() * 1000)
+
+
+def intern_text(value):
+    """Intern repeated strings such as vocations and killer names"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def records_to_dicts(records):
+    """Convert records to plain dicts at the JSON output boundary"""
+    return [record.to_dict() for record in records]
+
+
+class PlayerRecord:
+    """Online player row captured from the worlds page"""
+    __slots__ = ('name', 'level', 'vocation', 'timestamp')
+
+    def __init__(self, name, level, vocation, timestamp):
+        self.name = name
+        self.level = level
+        self.vocation = intern_text(vocation)
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, row):
+        return cls(row['name'], row['level'], row['vocation'], row['timestamp'])
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'level': self.level,
+            'vocation': self.vocation,
+            'timestamp': self.timestamp
+        }
+
+
+class DeathRecord:
+    """Death row parsed from the latest deaths page"""
+    __slots__ = ('player', 'level', 'killer', 'killers', 'time', 'death_timestamp', 'timestamp', 'id')
+
+    def __init__(self, player, level, killer, time_text, timestamp, death_id, killers=(),
+                 death_timestamp=None):
+        self.player = player
+        self.level = level
+        self.killer = intern_text(killer)
+        # Tuple of (name, is_player) pairs with interned names
+        self.killers = tuple((intern_text(name), is_player) for name, is_player in killers)
+        self.time = time_text
+        # UTC epoch milliseconds parsed from the page's time text, None if unparseable
+        self.death_timestamp = death_timestamp
+        self.timestamp = timestamp
+        self.id = death_id
+
+    @classmethod
+    def from_dict(cls, row):
+        killers = [(k['name'], k['player']) for k in row.get('killers', [])]
+        return cls(row['player'], row['level'], row['killer'], row['time'], row['timestamp'], row['id'],
+                   killers, row.get('death_timestamp'))
+
+    def to_dict(self):
+        return {
+            'player': self.player,
+            'level': self.level,
+            'killer': self.killer,
+            'killers': [{'name': name, 'player': is_player} for name, is_player in self.killers],
+            'time': self.time,
+            'death_timestamp': self.death_timestamp,
+            'timestamp': self.timestamp,
+            'id': self.id
+        }
+
+
+class LevelUpRecord:
+    """Level gain detected between two consecutive player snapshots"""
+    __slots__ = ('player', 'previous_level', 'new_level', 'vocation', 'timestamp')
+
+    def __init__(self, player, previous_level, new_level, vocation, timestamp):
+        self.player = player
+        self.previous_level = previous_level
+        self.new_level = new_level
+        self.vocation = intern_text(vocation)
+        self.timestamp = timestamp
+
+    @property
+    def level_gain(self):
+        return self.new_level - self.previous_level
+
+    @property
+    def id(self):
+        return f"{self.player}-{self.previous_level}-{self.new_level}-{self.timestamp // 1000}"
+
+    def to_dict(self):
+        return {
+            'player': self.player,
+            'previous_level': self.previous_level,
+            'new_level': self.new_level,
+            'level_gain': self.level_gain,
+            'vocation': self.vocation,
+            'timestamp': self.timestamp,
+            'id': self.id
+        }
+
+
+class LevelDownRecord:
+    """Level loss detected between two consecutive player snapshots"""
+    __slots__ = ('player', 'previous_level', 'new_level', 'vocation', 'timestamp')
+
+    def __init__(self, player, previous_level, new_level, vocation, timestamp):
+        self.player = player
+        self.previous_level = previous_level
+        self.new_level = new_level
+        self.vocation = intern_text(vocation)
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, row):
+        return cls(row['player'], row['previous_level'], row['new_level'], row['vocation'], row['timestamp'])
+
+    @property
+    def level_loss(self):
+        return self.previous_level - self.new_level
+
+    @property
+    def id(self):
+        return f"{self.player}-{self.previous_level}-{self.new_level}-{self.timestamp // 1000}"
+
+    def to_dict(self):
+        return {
+            'player': self.player,
+            'previous_level': self.previous_level,
+            'new_level': self.new_level,
+            'level_loss': self.level_loss,
+            'vocation': self.vocation,
+            'timestamp': self.timestamp,
+            'id': self.id
+        }
@@ -0,0 +1,195 @@
+import mmap
+import os
+import struct
+
+# Rewritten in place every run, so it lives in the workflow cache rather than in git
+HISTORY_FILE = 'online_history.rrd'
+MAGIC = b'RRRD'
+VERSION = 1
+
+# (step seconds, rows): one day of 3-minute points, 30 days hourly, 2 years daily
+ARCHIVES = ((180, 480), (3600, 720), (86400, 730))
+CONSOLIDATIONS = ('min', 'max', 'avg')
+
+VOCATIONS = ('None', 'Knight', 'Paladin', 'Sorcerer', 'Druid', 'Monk')
+LEVEL_BAND_SIZE = 200
+LEVEL_BANDS = 6  # 0-199 ... 800-999 and 1000+
+
+
+def base_vocation(vocation):
+    """Fold promotions into their base vocation ("Elite Knight" -> "Knight")"""
+    for base in VOCATIONS[1:]:
+        if base in vocation:
+            return base
+    return 'None'
+
+
+def series_names():
+    names = ['online']
+    for vocation in VOCATIONS:
+        names.append(f'{vocation}.count')
+        names.append(f'{vocation}.avg_level')
+        for band in range(LEVEL_BANDS):
+            names.append(f'{vocation}.band_{band * LEVEL_BAND_SIZE}')
+    return names
+
+
+SERIES = tuple(series_names())
+
+
+def snapshot_values(players):
+    """Online count, per-vocation counts, average level and level band histogram for one snapshot"""
+    values = dict.fromkeys(SERIES, 0.0)
+    level_sums = dict.fromkeys(VOCATIONS, 0)
+    values['online'] = float(len(players))
+    for player in players:
+        vocation = base_vocation(player.vocation)
+        band = min(player.level // LEVEL_BAND_SIZE, LEVEL_BANDS - 1)
+        values[f'{vocation}.count'] += 1
+        values[f'{vocation}.band_{band * LEVEL_BAND_SIZE}'] += 1
+        level_sums[vocation] += player.level
+
+    for vocation, level_sum in level_sums.items():
+        count = values[f'{vocation}.count']
+        if count:
+            values[f'{vocation}.avg_level'] = level_sum / count
+    return values
+
+
+class RoundRobinStore:
+    """Fixed-size, RRD-style history of per-snapshot aggregates
+
+    Each archive is a ring of `rows` buckets of `step` seconds. A bucket
+    keeps the min, max and running average of every series over the
+    samples that fell into it, and is overwritten when the ring wraps
+    around. Data is laid out column by column, so reading one series from
+    one archive touches rows * 4 bytes.
+
+    File layout: header, then per archive the bucket start times and sample
+    counts (int64 rings), then one float32 ring per series and consolidation.
+    """
+
+    def __init__(self, path=HISTORY_FILE, series=SERIES, archives=ARCHIVES):
+        self.path = path
+        self.series = tuple(series)
+        self.series_index = {name: index for index, name in enumerate(self.series)}
+        self.archives = tuple(archives)
+        self.header = self.build_header()
+        self.offsets = self.archive_offsets()
+        self.size = self.offsets[-1]
+        self.mm = None
+        self.file = None
+
+    def build_header(self):
+        header = struct.pack('<4sHHH', MAGIC, VERSION, len(self.archives), len(self.series))
+        for step, rows in self.archives:
+            header += struct.pack('<II', step, rows)
+        return header
+
+    def archive_offsets(self):
+        offsets = [len(self.header)]
+        for _, rows in self.archives:
+            offsets.append(offsets[-1] + rows * 16 + len(self.series) * len(CONSOLIDATIONS) * rows * 4)
+        return offsets
+
+    def open(self):
+        """Map the store, creating it (or recreating it when the layout changed)"""
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) == self.size:
+                self.file = open(self.path, 'r+b')
+                if self.file.read(len(self.header)) != self.header:
+                    print("Online history layout changed, starting a new store")
+                    self.file.close()
+                    self.file = None
+            if self.file is None:
+                self.create()
+            self.mm = mmap.mmap(self.file.fileno(), self.size)
+        except Exception as e:
+            print(f"Error opening online history: {e}")
+            self.close()
+
+    def create(self):
+        self.file = open(self.path, 'w+b')
+        self.file.write(self.header)
+        self.file.truncate(self.size)
+        self.file.flush()
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.flush()
+            self.mm.close()
+            self.mm = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def times_offset(self, archive):
+        return self.offsets[archive]
+
+    def counts_offset(self, archive):
+        return self.offsets[archive] + self.archives[archive][1] * 8
+
+    def values_offset(self, archive, series_index, consolidation):
+        rows = self.archives[archive][1]
+        column = series_index * len(CONSOLIDATIONS) + consolidation
+        return self.offsets[archive] + rows * 16 + column * rows * 4
+
+    def update(self, timestamp, values):
+        """Fold one snapshot (epoch seconds, series -> value) into every archive"""
+        if self.mm is None:
+            return
+        for archive, (step, rows) in enumerate(self.archives):
+            bucket_start = int(timestamp) // step * step
+            slot = (bucket_start // step) % rows
+            time_offset = self.times_offset(archive) + slot * 8
+            count_offset = self.counts_offset(archive) + slot * 8
+
+            if struct.unpack_from('<q', self.mm, time_offset)[0] != bucket_start:
+                # The ring wrapped (or the slot was never used): start a fresh bucket
+                struct.pack_into('<q', self.mm, time_offset, bucket_start)
+                count = 0
+            else:
+                count = struct.unpack_from('<q', self.mm, count_offset)[0]
+            count += 1
+            struct.pack_into('<q', self.mm, count_offset, count)
+
+            for index, name in enumerate(self.series):
+                value = float(values.get(name, 0.0))
+                min_offset = self.values_offset(archive, index, 0) + slot * 4
+                max_offset = self.values_offset(archive, index, 1) + slot * 4
+                avg_offset = self.values_offset(archive, index, 2) + slot * 4
+                if count == 1:
+                    low = high = average = value
+                else:
+                    low = min(struct.unpack_from('<f', self.mm, min_offset)[0], value)
+                    high = max(struct.unpack_from('<f', self.mm, max_offset)[0], value)
+                    average = struct.unpack_from('<f', self.mm, avg_offset)[0]
+                    average += (value - average) / count
+                struct.pack_into('<f', self.mm, min_offset, low)
+                struct.pack_into('<f', self.mm, max_offset, high)
+                struct.pack_into('<f', self.mm, avg_offset, average)
+
+    def fetch(self, series, step, consolidation='avg', start=None, end=None):
+        """(bucket start, value) pairs for one series from the archive with `step`, oldest first
+
+        Buckets with no samples, or overwritten by a later wrap, are skipped.
+        """
+        if self.mm is None:
+            return []
+        archive = [archive_step for archive_step, _ in self.archives].index(step)
+        rows = self.archives[archive][1]
+        values_offset = self.values_offset(archive, self.series_index[series], CONSOLIDATIONS.index(consolidation))
+
+        times = struct.unpack_from(f'<{rows}q', self.mm, self.times_offset(archive))
+        values = struct.unpack_from(f'<{rows}f', self.mm, values_offset)
+        latest = max(times)
+        oldest = latest - (rows - 1) * step
+        points = []
+        for bucket_start, value in zip(times, values):
+            if bucket_start < max(oldest, 1):
+                continue
+            if (start is not None and bucket_start < start) or (end is not None and bucket_start > end):
+                continue
+            points.append((bucket_start, value))
+        points.sort()
+        return points
@@ -0,0 +1,109 @@
+import json
+import os
+import zlib
+from collections.abc import MutableMapping
+
+STATE_DIR = os.getenv('RUBINOT_STATE_DIR', 'state')
+LEVEL_SHARDS = int(os.getenv('RUBINOT_LEVEL_SHARDS', '16'))
+LEGACY_LEVELS_FILE = 'previous_levels.json'
+
+
+def shard_index(name, shards):
+    # crc32 rather than hash(): string hashes are salted per process
+    return zlib.crc32(name.encode('utf-8')) % shards
+
+
+class ShardedLevels(MutableMapping):
+    """Last known level per player of one world, split into name-hashed shards
+
+    Shards live in state/<world>/levels-<n>.json, are read on first access
+    and only rewritten when something in them changed, so a run pays for
+    the worlds and shards it actually touches.
+    """
+
+    def __init__(self, world, directory=STATE_DIR, shards=LEVEL_SHARDS):
+        self.world = world
+        self.directory = os.path.join(directory, world)
+        self.shards = shards
+        self.loaded = {}
+        self.dirty = set()
+
+    def shard_path(self, index):
+        return os.path.join(self.directory, f"levels-{index:02d}.json")
+
+    def shard(self, index):
+        levels = self.loaded.get(index)
+        if levels is None:
+            levels = {}
+            path = self.shard_path(index)
+            try:
+                if os.path.exists(path):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        levels = json.load(f)
+            except Exception as e:
+                print(f"Error loading level shard {path}: {e}")
+            self.loaded[index] = levels
+        return levels
+
+    def shard_for(self, name):
+        return self.shard(shard_index(name, self.shards))
+
+    def __getitem__(self, name):
+        return self.shard_for(name)[name]
+
+    def __setitem__(self, name, level):
+        index = shard_index(name, self.shards)
+        levels = self.shard(index)
+        if levels.get(name) != level:
+            levels[name] = level
+            self.dirty.add(index)
+
+    def __delitem__(self, name):
+        index = shard_index(name, self.shards)
+        del self.shard(index)[name]
+        self.dirty.add(index)
+
+    def __iter__(self):
+        for index in range(self.shards):
+            yield from list(self.shard(index))
+
+    def __len__(self):
+        return sum(len(self.shard(index)) for index in range(self.shards))
+
+    def exists(self):
+        return os.path.isdir(self.directory)
+
+    def save(self):
+        """Write the shards that changed since they were loaded"""
+        if not self.dirty:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        saved = 0
+        for index in sorted(self.dirty):
+            path = self.shard_path(index)
+            try:
+                with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                    json.dump(self.loaded[index], f, indent=2, ensure_ascii=False, sort_keys=True)
+                os.replace(path + '.tmp', path)
+                saved += 1
+            except Exception as e:
+                print(f"Error saving level shard {path}: {e}")
+        self.dirty.clear()
+        return saved
+
+    def migrate_legacy(self, path=LEGACY_LEVELS_FILE):
+        """Move the old single-file, single-world previous_levels.json into this world's shards"""
+        if self.exists() or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except Exception as e:
+            print(f"Error reading legacy levels file: {e}")
+            return 0
+        for name, level in legacy.items():
+            self[name] = level
+        self.save()
+        os.replace(path, path + '.migrated')
+        print(f"Migrated {len(legacy)} player levels from {path} into {self.directory}")
+        return len(legacy)
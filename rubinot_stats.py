@@ -0,0 +1,105 @@
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from rubinot_timeline import death_time
+
+STATS_FILE = 'killer_stats.json'
+LEVEL_BAND_SIZE = 100
+RETENTION_DAYS = int(os.getenv('RUBINOT_STATS_RETENTION_DAYS', '90'))
+
+
+def level_band(level):
+    """Lower bound of the level band a death falls into (500 covers 500-599)"""
+    return level // LEVEL_BAND_SIZE * LEVEL_BAND_SIZE
+
+
+def day_bucket(timestamp_ms):
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+class KillerStats:
+    """Incrementally updated kill counters per day, level band and killer
+
+    counts[day][band][killer] holds the number of deaths a killer took part
+    in, so a top-N query only touches the days and bands it asks for.
+    """
+
+    def __init__(self, path=STATS_FILE):
+        self.path = path
+        self.counts = {}
+        self.kinds = {}
+        self.dirty = False
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                self.counts = saved.get('counts', {})
+                self.kinds = saved.get('kinds', {})
+                print(f"Loaded killer stats for {len(self.counts)} days")
+        except Exception as e:
+            print(f"Error loading killer stats: {e}")
+            self.counts, self.kinds = {}, {}
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'counts': self.counts,
+                    'kinds': self.kinds
+                }, f, ensure_ascii=False, separators=(',', ':'))
+            self.dirty = False
+        except Exception as e:
+            print(f"Error saving killer stats: {e}")
+
+    def add_deaths(self, deaths):
+        """Count newly seen deaths (deduplicated by the death timeline); returns how many"""
+        added = 0
+        for death in deaths:
+            day = day_bucket(death_time(death))
+            bands = self.counts.setdefault(day, {})
+            killers = bands.setdefault(str(level_band(death.level)), {})
+            # A killer listed twice in one death still took part in one death
+            for name, is_player in dict.fromkeys(death.killers):
+                killers[name] = killers.get(name, 0) + 1
+                self.kinds[name] = 'player' if is_player else 'creature'
+            added += 1
+
+        if added:
+            self.dirty = True
+            self.prune()
+        return added
+
+    def prune(self, retention_days=RETENTION_DAYS):
+        cutoff = day_bucket((time.time() - retention_days * 86400) * 1000)
+        for day in [day for day in self.counts if day < cutoff]:
+            del self.counts[day]
+
+    def top_killers(self, n=10, min_level=0, days=7, kind=None):
+        """Top-N killers over the last `days` days for victims in `min_level`'s level band or above
+
+        Counts are kept per 100-level band, so min_level is rounded down to
+        its band: min_level=550 includes victims from level 500. kind can be
+        'player' or 'creature' to restrict to PvP or PvE deaths.
+        """
+        min_band = level_band(min_level)
+        today = datetime.now(timezone.utc).date()
+        totals = Counter()
+        for offset in range(days):
+            bands = self.counts.get((today - timedelta(days=offset)).isoformat())
+            if not bands:
+                continue
+            for band, killers in bands.items():
+                if int(band) < min_band:
+                    continue
+                totals.update(killers)
+
+        if kind:
+            totals = Counter({name: count for name, count in totals.items() if self.kinds.get(name) == kind})
+        return totals.most_common(n)
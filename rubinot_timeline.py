@@ -0,0 +1,139 @@
+import heapq
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from rubinot_records import DeathRecord
+
+TIMELINE_FILE = 'death_timeline.json'
+TIMELINE_MAX_DEATHS = int(os.getenv('RUBINOT_TIMELINE_MAX_DEATHS', '1000'))
+
+# Server time of rubinot.com.br when the text carries no zone (Brasilia time)
+SITE_UTC_OFFSET = float(os.getenv('RUBINOT_SITE_UTC_OFFSET', '-3'))
+
+MONTHS = {name: number for number, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1)}
+ZONE_OFFSETS = {'UTC': 0, 'GMT': 0, 'CET': 1, 'CEST': 2, 'BRT': -3, 'BRST': -2}
+ZONE_PATTERN = re.compile(r'\b(' + '|'.join(ZONE_OFFSETS) + r')\b')
+
+TIME_PART = r',?\s+(\d{1,2}):(\d{2})(?::(\d{2}))?'
+# Date formats seen on the site, as (pattern, order of day/month/year groups)
+TIME_FORMATS = [
+    (re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{4})' + TIME_PART), ('day', 'month', 'year')),
+    (re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})' + TIME_PART), ('day', 'month', 'year')),
+    (re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})' + TIME_PART.replace(r',?\s+', r'[ T]')), ('year', 'month', 'day')),
+    (re.compile(r'([A-Za-z]{3})[a-z]*\s+(\d{1,2}),?\s+(\d{4})' + TIME_PART), ('month', 'day', 'year')),
+]
+
+# Index of the format that matched last; pages use one format throughout
+preferred_format = 0
+
+
+def match_time_format(text):
+    global preferred_format
+    order = [preferred_format] + [i for i in range(len(TIME_FORMATS)) if i != preferred_format]
+    for index in order:
+        pattern, fields = TIME_FORMATS[index]
+        match = pattern.search(text)
+        if match:
+            preferred_format = index
+            return match, fields
+    return None, None
+
+
+@lru_cache(maxsize=4096)
+def parse_death_time(text):
+    """Parse the page's death time text into UTC epoch milliseconds, or None"""
+    if not text:
+        return None
+    match, fields = match_time_format(text)
+    if not match:
+        return None
+
+    values = dict(zip(fields, match.groups()[:3]))
+    month = values['month']
+    month = MONTHS.get(month[:3].lower()) if month.isalpha() else int(month)
+    if not month:
+        return None
+
+    zone = ZONE_PATTERN.search(text)
+    offset = ZONE_OFFSETS[zone.group(1)] if zone else SITE_UTC_OFFSET
+    hour, minute, second = match.group(4), match.group(5), match.group(6) or '0'
+    try:
+        moment = datetime(int(values['year']), month, int(values['day']),
+                          int(hour), int(minute), int(second),
+                          tzinfo=timezone(timedelta(hours=offset)))
+    except ValueError:
+        return None
+    return int(moment.timestamp() * 1000)
+
+
+def death_time(death):
+    """Sort time for a death: the parsed page time, else when it was scraped"""
+    return death.death_timestamp if death.death_timestamp is not None else death.timestamp
+
+
+def stable_key(death):
+    """Identity of a death that does not change between runs"""
+    return (death.player, death.level, death.death_timestamp if death.death_timestamp is not None else death.time)
+
+
+def sort_deaths(deaths):
+    """Newest first, the order the deaths page uses"""
+    return sorted(deaths, key=death_time, reverse=True)
+
+
+def merge_deaths(*runs, limit=None):
+    """Linear k-way merge of newest-first death lists, dropping duplicates"""
+    merged = []
+    seen = set()
+    for death in heapq.merge(*runs, key=death_time, reverse=True):
+        key = stable_key(death)
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(death)
+        if limit and len(merged) >= limit:
+            break
+    return merged
+
+
+class DeathTimeline:
+    """Bounded, time-sorted history of deaths across runs"""
+
+    def __init__(self, path=TIMELINE_FILE, max_deaths=TIMELINE_MAX_DEATHS):
+        self.path = path
+        self.max_deaths = max_deaths
+        self.deaths = []
+        self.dirty = False
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.deaths = [DeathRecord.from_dict(row) for row in json.load(f)]
+        except Exception as e:
+            print(f"Error loading death timeline: {e}")
+            self.deaths = []
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump([death.to_dict() for death in self.deaths], f,
+                          ensure_ascii=False, separators=(',', ':'))
+            self.dirty = False
+        except Exception as e:
+            print(f"Error saving death timeline: {e}")
+
+    def merge(self, deaths):
+        """Merge a run's deaths into the timeline; returns the deaths not seen before"""
+        known = {stable_key(death) for death in self.deaths}
+        new_deaths = [death for death in deaths if stable_key(death) not in known]
+        if new_deaths:
+            self.deaths = merge_deaths(self.deaths, sort_deaths(new_deaths), limit=self.max_deaths)
+            self.dirty = True
+        return new_deaths
@@ -0,0 +1,186 @@
+import bisect
+import json
+import os
+
+from rubinot_output import NDJSONWriter
+
+WATCHLIST_FILE = 'watchlist.json'
+# Append-only NDJSON stream, so a consumer that skips runs misses nothing
+NOTIFICATIONS_STREAM = 'rubinot_notifications'
+
+
+class Rule:
+    """One member subscription
+
+    A rule matches on player, guild, killer and/or a level range; every
+    field that is set has to match. `events` limits it to 'death' and/or
+    'level_up'.
+    """
+    __slots__ = ('id', 'subscriber', 'player', 'guild', 'killer', 'min_level', 'max_level', 'events')
+
+    def __init__(self, rule_id, subscriber, player=None, guild=None, killer=None,
+                 min_level=None, max_level=None, events=('death', 'level_up')):
+        self.id = rule_id
+        self.subscriber = subscriber
+        self.player = player.lower() if player else None
+        self.guild = guild.lower() if guild else None
+        self.killer = killer.lower() if killer else None
+        self.min_level = min_level
+        self.max_level = max_level
+        self.events = frozenset(events)
+
+    @classmethod
+    def from_dict(cls, row):
+        return cls(row['id'], row['subscriber'], row.get('player'), row.get('guild'), row.get('killer'),
+                   row.get('min_level'), row.get('max_level'), row.get('events', ('death', 'level_up')))
+
+    @property
+    def has_level_range(self):
+        return self.min_level is not None or self.max_level is not None
+
+    def matches(self, kind, player, level, killers, guild):
+        if kind not in self.events:
+            return False
+        if self.player and self.player != player:
+            return False
+        if self.guild and self.guild != guild:
+            return False
+        if self.killer and self.killer not in killers:
+            return False
+        if self.min_level is not None and level < self.min_level:
+            return False
+        if self.max_level is not None and level > self.max_level:
+            return False
+        return True
+
+
+class LevelIntervalIndex:
+    """Sorted index over level thresholds and [min_level, max_level] ranges
+
+    Open-ended thresholds ("level 500+") are kept sorted by min_level, so
+    the matches for a level are a prefix found with one bisect. Bounded
+    ranges split the level axis into elementary segments, each holding the
+    rules that cover it.
+    """
+
+    def __init__(self, rules):
+        thresholds = sorted((rule for rule in rules if rule.max_level is None), key=lambda rule: rule.min_level)
+        self.threshold_levels = [rule.min_level for rule in thresholds]
+        self.threshold_rules = thresholds
+
+        bounded = [rule for rule in rules if rule.max_level is not None]
+        points = set()
+        for rule in bounded:
+            points.add(rule.min_level or 0)
+            points.add(rule.max_level + 1)
+        self.bounds = sorted(points)
+        self.segments = [[] for _ in self.bounds]
+        for rule in bounded:
+            start = bisect.bisect_left(self.bounds, rule.min_level or 0)
+            end = bisect.bisect_left(self.bounds, rule.max_level + 1)
+            for segment in range(start, end):
+                self.segments[segment].append(rule)
+
+    def stab(self, level):
+        """Rules whose level threshold or range contains `level`"""
+        matches = self.threshold_rules[:bisect.bisect_right(self.threshold_levels, level)]
+        index = bisect.bisect_right(self.bounds, level) - 1
+        if index >= 0:
+            matches += self.segments[index]
+        return matches
+
+
+class Watchlist:
+    """Indexed rule engine for death and level-up notifications
+
+    Each rule is filed under its most selective field (player, then killer,
+    then guild, then level range), so an event is only checked against
+    rules that could possibly match it.
+    """
+
+    def __init__(self, rules=()):
+        self.rules = list(rules)
+        self.by_player = {}
+        self.by_killer = {}
+        self.by_guild = {}
+        self.unindexed = []
+        ranged = []
+        for rule in self.rules:
+            if rule.player:
+                self.by_player.setdefault(rule.player, []).append(rule)
+            elif rule.killer:
+                self.by_killer.setdefault(rule.killer, []).append(rule)
+            elif rule.guild:
+                self.by_guild.setdefault(rule.guild, []).append(rule)
+            elif rule.has_level_range:
+                ranged.append(rule)
+            else:
+                self.unindexed.append(rule)
+        self.by_level = LevelIntervalIndex(ranged)
+
+    @classmethod
+    def load(cls, path=WATCHLIST_FILE):
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    rules = [Rule.from_dict(row) for row in json.load(f)]
+                print(f"Loaded {len(rules)} watchlist rules")
+                return cls(rules)
+        except Exception as e:
+            print(f"Error loading watchlist: {e}")
+        return cls()
+
+    def candidates(self, player, level, killers, guild):
+        yield from self.by_player.get(player, ())
+        for killer in killers:
+            yield from self.by_killer.get(killer, ())
+        if guild:
+            yield from self.by_guild.get(guild, ())
+        yield from self.by_level.stab(level)
+        yield from self.unindexed
+
+    def match(self, kind, player, level, killers=(), guild=None):
+        """Rules matching one event"""
+        player = player.lower()
+        killers = {name.lower() for name in killers}
+        guild = guild.lower() if guild else None
+        return [rule for rule in self.candidates(player, level, killers, guild)
+                if rule.matches(kind, player, level, killers, guild)]
+
+    def notifications(self, deaths, level_ups, guild_of=None):
+        """Build one notification per (rule, event) for a scrape's deaths and level-ups"""
+        if not self.rules:
+            return []
+        guild_of = guild_of or (lambda name: None)
+
+        notifications = []
+        for death in deaths:
+            killers = [name for name, _ in death.killers]
+            for rule in self.match('death', death.player, death.level, killers, guild_of(death.player)):
+                notifications.append({
+                    'rule': rule.id,
+                    'subscriber': rule.subscriber,
+                    'event': 'death',
+                    'event_id': death.id,
+                    'data': death.to_dict()
+                })
+        for level_up in level_ups:
+            for rule in self.match('level_up', level_up.player, level_up.new_level,
+                                   guild=guild_of(level_up.player)):
+                notifications.append({
+                    'rule': rule.id,
+                    'subscriber': rule.subscriber,
+                    'event': 'level_up',
+                    'event_id': level_up.id,
+                    'data': level_up.to_dict()
+                })
+        return notifications
+
+
+def save_notifications(notifications, path=NOTIFICATIONS_STREAM):
+    """Append a run's notifications to the notifications stream; returns how many"""
+    try:
+        return NDJSONWriter(path).write_rows(notifications) if notifications else 0
+    except Exception as e:
+        print(f"Error saving notifications: {e}")
+        return 0
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+
+import export_columnar
+
+
+def death(player, level, killer, time_text, scraped_at):
+    # Ids as older scrapers built them: from the scrape time, not the death time
+    return {'player': player, 'level': level, 'killer': killer,
+            'killers': [{'name': killer, 'player': False}], 'time': time_text,
+            'timestamp': scraped_at * 1000, 'id': f"{player}-{level}-{killer}-{scraped_at}"}
+
+
+class GitSourceTest(unittest.TestCase):
+    """Deaths committed over several runs with old-style, time-based ids"""
+
+    def setUp(self):
+        self.previous_dir = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.git('init', '-q')
+        self.git('config', 'user.email', 'scraper@example.com')
+        self.git('config', 'user.name', 'scraper')
+
+        runs = [
+            [death('Qumian', 522, 'a juggernaut', '19.10.2025, 14:59:58', 1760886000)],
+            [death('Qumian', 522, 'a juggernaut', '19.10.2025, 14:59:58', 1760886180),
+             death('Lya', 310, 'a dragon', 'Unknown', 1760886180)],
+            [death('Bel Midraka', 789, 'the pale worm', '19.10.2025, 15:04:12', 1760886360),
+             death('Qumian', 522, 'a juggernaut', '19.10.2025, 14:59:58', 1760886360),
+             death('Lya', 310, 'a dragon', 'Unknown', 1760886360)],
+        ]
+        for index, deaths in enumerate(runs):
+            with open('rubinot_deaths.json', 'w', encoding='utf-8') as f:
+                json.dump({'world': 'Mystian', 'data': deaths}, f)
+            self.git('add', 'rubinot_deaths.json')
+            self.git('commit', '-q', '-m', f"run {index}")
+
+    def tearDown(self):
+        os.chdir(self.previous_dir)
+        self.tmp.cleanup()
+
+    def git(self, *args):
+        subprocess.run(['git', *args], check=True)
+
+    def args(self, **overrides):
+        values = dict(format='parquet', out='export', git=True, history_dir='history',
+                      since=None, batch_rows=export_columnar.BATCH_ROWS)
+        values.update(overrides)
+        return argparse.Namespace(**values)
+
+    def test_each_death_exported_once(self):
+        rows = [row for world, day, row in export_columnar.export_rows('deaths', self.args())]
+        self.assertEqual(sorted((row['player'], row['level']) for row in rows),
+                         [('Bel Midraka', 789), ('Lya', 310), ('Qumian', 522)])
+        # The first commit that saw a death wins
+        qumian = next(row for row in rows if row['player'] == 'Qumian')
+        self.assertEqual(qumian['id'], 'Qumian-522-a juggernaut-1760886000')
+
+    def test_since_filters_after_deduplication(self):
+        rows = list(export_columnar.export_rows('deaths', self.args(since='2025-10-20')))
+        self.assertEqual(rows, [])
+
+    def test_pyarrow_writes(self):
+        try:
+            pa = export_columnar.load_pyarrow()
+        except RuntimeError:
+            self.skipTest("pyarrow is not installed")
+        schema = export_columnar.table_schemas(pa)['deaths']
+        for output_format in ('parquet', 'arrow'):
+            with self.subTest(output_format=output_format):
+                args = self.args(format=output_format, out=f"export-{output_format}")
+                self.assertEqual(export_columnar.export_table(pa, 'deaths', schema, args), 3)
+                paths = [os.path.join(root, name) for root, dirs, names in os.walk(args.out) for name in names]
+                self.assertTrue(paths)
+                total = 0
+                for path in paths:
+                    if output_format == 'parquet':
+                        table = pa.parquet.read_table(path)
+                    else:
+                        with pa.memory_map(path) as source:
+                            table = pa.ipc.open_file(source).read_all()
+                    self.assertEqual(table.schema.names, schema.names)
+                    total += table.num_rows
+                self.assertEqual(total, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()